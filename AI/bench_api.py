@@ -0,0 +1,268 @@
+"""
+Load test and latency benchmark for the iAlert AI service
+Drives the endpoints of main.py with a configurable request mix and
+concurrency, then reports throughput and p50/p95/p99 latency per endpoint.
+Results are saved as JSON so runs can be compared between commits.
+
+Usage:
+    # Start a local EONET stub + the API, run for 20s with 32 clients
+    python AI/bench_api.py --spawn --concurrency 32 --duration 20
+
+    # Against a running server, custom mix, compare with a previous run
+    python AI/bench_api.py --base-url http://localhost:8000 \\
+        --mix predict=5,batch=1,disasters=3,near=2 --compare bench_results/previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+AI_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PAIRS = [
+    ("Asia", "Japan"), ("Asia", "India"), ("Asia", "Indonesia"), ("Asia", "Philippines"),
+    ("Americas", "Mexico"), ("Americas", "Brazil"), ("Americas", "Haiti"),
+    ("Europe", "Italy"), ("Europe", "France"), ("Africa", "Kenya"), ("Oceania", "Fiji"),
+]
+
+DEFAULT_MIX = "health=1,predict=5,batch=1,disasters=3,near=2,zones=1"
+
+
+def build_request(name, rng):
+    """(method, path, json body) for one request of the given kind"""
+    if name == "health":
+        return "GET", "/api/health", None
+    if name == "model_info":
+        return "GET", "/api/model-info", None
+    if name == "predict":
+        region, country = rng.choice(PAIRS)
+        return "POST", "/api/predict-disaster", {"region": region, "country": country}
+    if name == "batch":
+        items = [{"region": r, "country": c} for r, c in (rng.choice(PAIRS) for _ in range(50))]
+        return "POST", "/api/predict-disaster/batch", {"items": items}
+    if name == "disasters":
+        return "GET", f"/api/disasters?limit={rng.choice([10, 50, 100])}", None
+    if name == "near":
+        lat, lng = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        return "GET", f"/api/disasters/near?lat={lat:.3f}&lng={lng:.3f}&radius_km=1000", None
+    if name == "zones":
+        zones = [
+            {"user_id": f"user_{i % 300}", "lat": rng.uniform(-60, 70),
+             "lng": rng.uniform(-180, 180), "radius_km": 500}
+            for i in range(1000)
+        ]
+        return "POST", "/api/zones/match", {"zones": zones}
+    raise ValueError(f"Unknown request kind: {name}")
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def run_load(base_url, weights, concurrency, duration, seed):
+    names = list(weights)
+    cum_weights = list(weights.values())
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id):
+            rng = random.Random(seed + worker_id)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights=cum_weights)[0]
+                method, path, body = build_request(name, rng)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                if ok:
+                    latencies[name].append(elapsed * 1000)
+                else:
+                    errors[name] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    endpoints = {}
+    for name in names:
+        values = sorted(latencies[name])
+        endpoints[name] = {
+            "count": len(values),
+            "errors": errors[name],
+            "rps": len(values) / wall,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1] if values else None,
+        }
+
+    everything = sorted(v for values in latencies.values() for v in values)
+    total = {
+        "count": len(everything),
+        "errors": sum(errors.values()),
+        "rps": len(everything) / wall,
+        "p50_ms": percentile(everything, 50),
+        "p95_ms": percentile(everything, 95),
+        "p99_ms": percentile(everything, 99),
+    }
+    return endpoints, total
+
+
+def print_table(endpoints, total):
+    def fmt(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    print(f"\n{'endpoint':<12} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in list(endpoints.items()) + [("TOTAL", total)]:
+        print(f"{name:<12} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+              f"{fmt(stats['p50_ms']):>8} {fmt(stats['p95_ms']):>8} {fmt(stats['p99_ms']):>8}")
+
+
+def print_comparison(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+
+    print(f"\nCompared with {previous_path} ({previous.get('git_commit', '?')}):")
+    print(f"{'endpoint':<12} {'req/s':>16} {'p95 ms':>18}")
+    for name, stats in list(current["endpoints"].items()) + [("TOTAL", current["total"])]:
+        before = previous["total"] if name == "TOTAL" else previous["endpoints"].get(name)
+        if not before or not before["rps"] or not before["p95_ms"] or stats["p95_ms"] is None:
+            continue
+        rps_change = (stats["rps"] - before["rps"]) / before["rps"] * 100
+        p95_change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        print(f"{name:<12} {stats['rps']:>8.1f} ({rps_change:+5.1f}%) {stats['p95_ms']:>9.1f} ({p95_change:+5.1f}%)")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=AI_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def spawn_servers(port, stub_port, events):
+    """Start eonet_stub.py and the API (pointed at the stub)"""
+    stub = subprocess.Popen(
+        [sys.executable, "eonet_stub.py", "--port", str(stub_port), "--events", str(events)],
+        cwd=AI_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    env = dict(
+        os.environ,
+        EONET_BASE_URL=f"http://127.0.0.1:{stub_port}/api",
+        EONET_USE_PROXIES="0"
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=AI_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            health = httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=2).json()
+            if health.get("model_status") == "loaded":
+                # Fill the disasters cache so the run measures steady state
+                httpx.get(f"http://127.0.0.1:{port}/api/disasters", timeout=30)
+                return [api, stub]
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.5)
+
+    for process in (api, stub):
+        process.kill()
+    raise RuntimeError("API did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="iAlert AI service load test")
+    parser.add_argument("--base-url", default=None, help="Server to test (default: spawned local server)")
+    parser.add_argument("--spawn", action="store_true", help="Start the EONET stub and the API locally")
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--stub-port", type=int, default=9791)
+    parser.add_argument("--events", type=int, default=300, help="Events served by the stub")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma-separated name=weight")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON results path (default: bench_results/<time>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    if not args.spawn and not args.base_url:
+        parser.error("use --spawn or --base-url")
+
+    weights = parse_mix(args.mix)
+    processes = spawn_servers(args.port, args.stub_port, args.events) if args.spawn else []
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+
+    try:
+        print(f"Running {args.duration:.0f}s against {base_url} with {args.concurrency} clients, mix {args.mix}")
+        endpoints, total = asyncio.run(
+            run_load(base_url, weights, args.concurrency, args.duration, args.seed)
+        )
+    finally:
+        for process in processes:
+            process.terminate()
+
+    print_table(endpoints, total)
+
+    commit = git_commit()
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": commit,
+        "config": {
+            "base_url": base_url,
+            "spawned": args.spawn,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": weights,
+            "stub_events": args.events if args.spawn else None,
+        },
+        "endpoints": endpoints,
+        "total": total,
+    }
+
+    output = args.output or os.path.join(
+        "bench_results", f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
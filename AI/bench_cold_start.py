@@ -0,0 +1,100 @@
+"""
+Cold-start benchmark for the AI service
+Starts uvicorn repeatedly and measures, from process spawn:
+
+    live:             first 200 from /api/health (port open)
+    ready:            first 200 from /api/ready (model loaded and warmed up)
+    first prediction: first successful POST /api/predict-disaster, sent as
+                      soon as the port is open
+
+for MODEL_LOAD_MODE=blocking (model loaded before the port opens) and
+background (port opens first, model loads in a worker thread).
+
+Usage (from the repository root, model files in AI/):
+    python AI/bench_cold_start.py
+    python AI/bench_cold_start.py --runs 10 --modes background
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+AI_DIR = os.path.dirname(os.path.abspath(__file__))
+POLL_INTERVAL = 0.01
+
+
+def request(port, path, body=None):
+    """Status code of one request, or None if the server is not listening yet"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}", data=data,
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def wait_for(port, path, start, timeout, body=None):
+    """Seconds since `start` until `path` answers 200"""
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        if request(port, path, body) == 200:
+            return time.perf_counter() - start
+        time.sleep(POLL_INTERVAL)
+    raise RuntimeError(f"{path} did not answer 200 within {timeout}s")
+
+
+def measure(mode, port, timeout):
+    env = dict(os.environ, MODEL_LOAD_MODE=mode, DISASTERS_BACKGROUND_REFRESH="0")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=AI_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        live = wait_for(port, "/api/health", start, timeout)
+        first = wait_for(port, "/api/predict-disaster", start, timeout,
+                         body={"region": "Asia", "country": "Japan"})
+        ready = wait_for(port, "/api/ready", start, timeout)
+        return {"live": live, "first_prediction": first, "ready": ready}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["blocking", "background"])
+    parser.add_argument("--port", type=int, default=8792)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", default=None, help="Save all runs as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'mode':>11} {'live s':>8} {'first prediction s':>19} {'ready s':>8}   (median of {args.runs})")
+    for mode in args.modes:
+        runs = [measure(mode, args.port, args.timeout) for _ in range(args.runs)]
+        results[mode] = runs
+        median = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        print(f"{mode:>11} {median['live']:>8.2f} {median['first_prediction']:>19.2f} {median['ready']:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
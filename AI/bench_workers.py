@@ -0,0 +1,108 @@
+"""
+Memory benchmark for multi-worker deployments
+Starts gunicorn + uvicorn workers with and without PRELOAD_MODEL and
+reports how much memory each worker costs (Linux only, reads /proc).
+
+    per-worker: every worker loads its own copy of the model on startup
+    preload:    the model is loaded once before fork and shared copy-on-write
+
+Usage (from the repository root, model files in AI/):
+    python AI/bench_workers.py
+    python AI/bench_workers.py --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+AI_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_kb(pid, fields):
+    """Sum the given fields (in kB) from /proc/<pid>/smaps_rollup"""
+    total = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in fields:
+                total += int(rest.split()[0])
+    return total
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_until_ready(port, workers, timeout=120):
+    """Wait until the model answers in (very likely) every worker"""
+    deadline = time.time() + timeout
+    ready = 0
+    while time.time() < deadline and ready < workers * 4:
+        try:
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/api/predict-disaster",
+                data=b'{"region": "Asia", "country": "Japan"}',
+                headers={"Content-Type": "application/json"}
+            )
+            with urllib.request.urlopen(request, timeout=5) as response:
+                if response.status == 200:
+                    ready += 1
+                    continue
+        except Exception:
+            pass
+        time.sleep(0.5)
+    if ready < workers * 4:
+        raise RuntimeError("server did not become ready")
+
+
+def measure(workers, preload, port):
+    env = dict(os.environ, DISASTERS_BACKGROUND_REFRESH="0")
+    command = [
+        sys.executable, "-m", "gunicorn", "main:app",
+        "-k", "uvicorn.workers.UvicornWorker",
+        "-w", str(workers),
+        "-b", f"127.0.0.1:{port}",
+        "--log-level", "warning"
+    ]
+    if preload:
+        env["PRELOAD_MODEL"] = "1"
+        command.append("--preload")
+
+    server = subprocess.Popen(command, cwd=AI_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port, workers)
+        time.sleep(1)
+        pids = [server.pid] + children(server.pid)
+        pss = sum(read_kb(pid, {"Pss"}) for pid in pids)
+        uss = [read_kb(pid, {"Private_Clean", "Private_Dirty"}) for pid in children(server.pid)]
+        return pss / 1024, sum(uss) / len(uss) / 1024
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker memory benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'mode':>11} {'total PSS MB':>13} {'private MB/worker':>18}")
+    for workers in args.workers:
+        results = {}
+        for preload in (False, True):
+            mode = "preload" if preload else "per-worker"
+            results[mode] = measure(workers, preload, args.port)
+            total, private = results[mode]
+            print(f"{workers:>8} {mode:>11} {total:>13.1f} {private:>18.1f}")
+        saved = results["per-worker"][1] - results["preload"][1]
+        print(f"{'':>8} {'saved':>11} {results['per-worker'][0] - results['preload'][0]:>13.1f} {saved:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark for bulk zone-to-event matching (/api/zones/match)
+Times main._match_zones against synthetic zones and events and shows how it
+scales with the number of zones, compared with the per-zone loop used by
+the Node backend. The endpoint column times the whole request (JSON
+validation, matching, grouping by user and encoding) through the ASGI app,
+and loop lag is the longest stall of the event loop meanwhile.
+
+Usage:
+    python AI/bench_zones.py
+    python AI/bench_zones.py --events 1000 --zones 1000 10000 50000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+from eonet_stub import CATEGORIES, make_events  # noqa: E402
+
+
+def naive_match(zones, events):
+    """One haversine per (zone, event), like calculateDistance in alerts.routes.js"""
+    matches = 0
+    for z_lat, z_lng, radius, selected in zones:
+        for evt in events:
+            if selected and evt["category"] not in selected:
+                continue
+            lat1, lng1 = math.radians(z_lat), math.radians(z_lng)
+            lat2, lng2 = math.radians(evt["lat"]), math.radians(evt["lng"])
+            a = (
+                math.sin((lat2 - lat1) / 2) ** 2
+                + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+            )
+            if 2 * main.EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))) <= radius:
+                matches += 1
+    return matches
+
+
+async def time_endpoint(body):
+    """(seconds for one POST /api/zones/match, longest event-loop stall in seconds)"""
+    tick = 0.005
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(tick)
+            lag = max(lag, time.perf_counter() - start - tick)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        monitor = asyncio.ensure_future(ticker())
+        await asyncio.sleep(tick)
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/zones/match", content=body, headers={"Content-Type": "application/json"}
+        )
+        elapsed = time.perf_counter() - start
+        done = True
+        await monitor
+    response.raise_for_status()
+    return elapsed, lag
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Zone matching benchmark")
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--zones", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--naive-limit", type=int, default=1000,
+                        help="Skip the pure-Python loop above this many zones")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw_events = make_events(args.events)
+    events = main._process_events(raw_events)
+    main._build_spatial_index(events)
+    # Mark the store as synced so the endpoint answers from this index
+    main._event_store["last_sync"] = datetime.now()
+
+    rng = np.random.default_rng(0)
+    print(f"Events: {len(events)}")
+    print(f"{'zones':>8} {'vectorized ms':>14} {'zones/s':>12} {'matches':>9} {'naive ms':>10} "
+          f"{'endpoint ms':>12} {'loop lag ms':>12}")
+
+    for n in args.zones:
+        lat = rng.uniform(-60, 70, n)
+        lng = rng.uniform(-180, 180, n)
+        radius = rng.choice([100.0, 250.0, 500.0], n)
+        categories = [
+            [] if rng.random() < 0.5 else list(rng.choice(CATEGORIES, 2, replace=False))
+            for _ in range(n)
+        ]
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            zone_idx, _, _ = main._match_zones(lat, lng, radius, categories)
+            best = min(best, time.perf_counter() - start)
+
+        naive = "-"
+        if n <= args.naive_limit:
+            zones = list(zip(lat.tolist(), lng.tolist(), radius.tolist(), categories))
+            start = time.perf_counter()
+            naive_matches = naive_match(zones, events)
+            naive = f"{(time.perf_counter() - start) * 1000:.1f}"
+            assert naive_matches == len(zone_idx), "vectorized and naive results differ"
+
+        body = json.dumps({"zones": [
+            {"user_id": f"user_{i % max(1, n // 10)}", "lat": la, "lng": ln, "radius_km": r, "categories": c}
+            for i, (la, ln, r, c) in enumerate(zip(lat.tolist(), lng.tolist(), radius.tolist(),
+                                                   [[str(x) for x in cats] for cats in categories]))
+        ]}).encode()
+        endpoint, lag = asyncio.run(time_endpoint(body))
+
+        print(f"{n:>8} {best * 1000:>14.1f} {n / best:>12.0f} {len(zone_idx):>9} {naive:>10} "
+              f"{endpoint * 1000:>12.1f} {lag * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main_bench()
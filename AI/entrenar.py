@@ -1,3 +1,7 @@
+import hashlib
+import os
+import sys
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder, LabelEncoder
@@ -7,35 +11,99 @@ from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 import warnings
 
+from modelos_npz import BosqueCompilado, FrecuenciasNpz
+
 # Ignorar advertencias futuras de scikit-learn para una salida más limpia
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-def entrenar_modelo_desastres(file_path):
+# Únicas columnas del Excel que usa el modelo
+COLUMNAS = ['Region', 'Country', 'Disaster Type']
+
+
+def _hash_archivo(file_path):
+    """SHA-256 del contenido de un archivo (invalida la caché si el Excel cambia)"""
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _ruta_cache(file_path):
+    return os.path.splitext(file_path)[0] + ".cache.npz"
+
+
+def cargar_datos(file_path):
     """
-    Carga, limpia, entrena y evalúa un modelo de predicción de desastres
-    basado en Región y País. Filtra automáticamente clases con pocos registros.
+    Carga las columnas usadas del Excel de EM-DAT como categorías.
+    La primera vez convierte el Excel a una caché columnar (.npz con
+    códigos y categorías por columna); las siguientes lecturas usan la
+    caché mientras el hash del Excel no cambie.
     """
-    try:
-        df = pd.read_excel(file_path)
-    except Exception as e:
-        print(f"Error al leer el archivo: {e}")
-        return None, None
+    ruta_cache = _ruta_cache(file_path)
+    hash_fuente = _hash_archivo(file_path)
 
-    print("Datos cargados exitosamente.")
+    if os.path.exists(ruta_cache):
+        try:
+            with np.load(ruta_cache, allow_pickle=False) as cache:
+                if str(cache['source_hash']) == hash_fuente:
+                    return pd.DataFrame({
+                        col: pd.Categorical.from_codes(
+                            cache[f'{col}__codes'],
+                            categories=cache[f'{col}__categories']
+                        )
+                        for col in COLUMNAS
+                    })
+        except Exception as e:
+            print(f"Caché inválida, se vuelve a leer el Excel: {e}")
+
+    df = pd.read_excel(file_path, usecols=COLUMNAS)
+
+    arrays = {'source_hash': np.array(hash_fuente)}
+    columnas = {}
+    for col in COLUMNAS:
+        categorico = df[col].astype('category')
+        arrays[f'{col}__codes'] = categorico.cat.codes.to_numpy()
+        arrays[f'{col}__categories'] = np.asarray(categorico.cat.categories, dtype=str)
+        columnas[col] = pd.Categorical.from_codes(
+            arrays[f'{col}__codes'], categories=arrays[f'{col}__categories']
+        )
+
+    np.savez(ruta_cache, **arrays)
+    print(f"Caché de datos creada: {ruta_cache}")
+    return pd.DataFrame(columnas)
 
-    features = ['Region', 'Country']
-    target = 'Disaster Type'
+FEATURES = ['Region', 'Country']
+TARGET = 'Disaster Type'
+
+
+def limpiar_datos(df):
+    """Quita filas con nulos y normaliza el texto de las columnas usadas"""
+    features = FEATURES
+    target = TARGET
 
     # Limpiar nulos
     df_clean = df[features + [target]].dropna()
-    if df_clean.empty:
-        print("Error: No hay datos después de limpiar valores nulos.")
-        return None, None
 
     # Normalizar texto (elimina diferencias de mayúsculas y espacios)
     df_clean['Region'] = df_clean['Region'].astype(str).str.strip().str.title()
     df_clean['Country'] = df_clean['Country'].astype(str).str.strip().str.title()
     df_clean[target] = df_clean[target].astype(str).str.strip().str.title()
+    return df_clean
+
+
+def preparar_datos(df):
+    """
+    Limpia los datos y filtra clases con menos de 2 registros.
+    Devuelve (X, y) o (None, None) si no quedan datos suficientes.
+    """
+    features = FEATURES
+    target = TARGET
+
+    df_clean = limpiar_datos(df)
+    if df_clean.empty:
+        print("Error: No hay datos después de limpiar valores nulos.")
+        return None, None
 
     # Mostrar distribución original
     print("\nDistribución original de desastres:")
@@ -60,8 +128,34 @@ def entrenar_modelo_desastres(file_path):
     print(f"Total de registros después de filtrar: {len(df_clean)}")
 
     # Definir X e y
-    X = df_clean[features]
-    y = df_clean[target]
+    return df_clean[features], df_clean[target]
+
+
+def crear_pipeline():
+    """One-hot de Región y País + RandomForest (el modelo que usa la API)"""
+    categorical_transformer = OneHotEncoder(handle_unknown='ignore')
+    preprocessor = ColumnTransformer([('cat', categorical_transformer, FEATURES)])
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    return Pipeline(steps=[('preprocessor', preprocessor), ('model', model)])
+
+
+def entrenar_modelo_desastres(file_path):
+    """
+    Carga, limpia, entrena y evalúa un modelo de predicción de desastres
+    basado en Región y País. Filtra automáticamente clases con pocos registros.
+    """
+    try:
+        df = cargar_datos(file_path)
+    except Exception as e:
+        print(f"Error al leer el archivo: {e}")
+        return None, None
+
+    print("Datos cargados exitosamente.")
+
+    features = FEATURES
+    X, y = preparar_datos(df)
+    if X is None:
+        return None, None
 
     # Codificar etiquetas
     le = LabelEncoder()
@@ -90,10 +184,7 @@ def entrenar_modelo_desastres(file_path):
     print(f"Entrenamiento: {len(X_train)}, Prueba: {len(X_test)}")
 
     # Crear pipeline
-    categorical_transformer = OneHotEncoder(handle_unknown='ignore')
-    preprocessor = ColumnTransformer([('cat', categorical_transformer, features)])
-    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
-    pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('model', model)])
+    pipeline = crear_pipeline()
 
     print("\nEntrenando el modelo...")
     pipeline.fit(X_train, y_train)
@@ -107,6 +198,497 @@ def entrenar_modelo_desastres(file_path):
     return pipeline, le
 
 
+def guardar_catalogo(X, salida="paises_por_region.json"):
+    """
+    Guarda {región: [países]} con los pares vistos en los datos. La API
+    cruza este archivo con las categorías del modelo para armar el
+    catálogo de países por continente.
+    """
+    import json
+
+    catalogo = {}
+    for region, pais in sorted(set(zip(X['Region'], X['Country']))):
+        catalogo.setdefault(region, []).append(pais)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(catalogo, f, ensure_ascii=False, indent=1)
+    print(f"Catálogo de {sum(len(v) for v in catalogo.values())} países en "
+          f"{len(catalogo)} regiones guardado en {salida}")
+
+
+# --- Modelo de frecuencias empíricas ---
+
+class ModeloFrecuencias(FrecuenciasNpz):
+    """
+    Estima P(tipo de desastre | región, país) directamente con conteos.
+    Cada país se suaviza hacia la distribución de su región y cada región
+    hacia la global. La predicción, guardar y cargar (formato .npz que
+    también lee main.py) están en modelos_npz.FrecuenciasNpz.
+    """
+
+    def fit(self, X, y, n_clases=None):
+        y = np.asarray(y)
+        n_clases = n_clases or int(y.max()) + 1
+
+        self.regiones_ = sorted(set(X['Region']))
+        self.pares_ = sorted(set(zip(X['Region'], X['Country'])))
+        self.conteos_region_ = np.zeros((len(self.regiones_), n_clases))
+        self.conteos_par_ = np.zeros((len(self.pares_), n_clases))
+
+        self.version_ = 1
+        self.deltas_ = []   # hashes de los archivos de registros ya sumados
+        self.actualizar(X, y)
+        return self
+
+    def actualizar(self, X, y):
+        """Suma nuevos registros a los conteos (agrega regiones/países nuevos)"""
+        y = np.asarray(y)
+        regiones = list(X['Region'])
+        pares = list(zip(X['Region'], X['Country']))
+
+        nuevas_regiones = sorted(set(regiones) - set(self.regiones_))
+        nuevos_pares = sorted(set(pares) - set(self.pares_))
+        n_clases = self.conteos_par_.shape[1]
+        if nuevas_regiones:
+            self.regiones_ += nuevas_regiones
+            self.conteos_region_ = np.vstack([self.conteos_region_, np.zeros((len(nuevas_regiones), n_clases))])
+        if nuevos_pares:
+            self.pares_ += nuevos_pares
+            self.conteos_par_ = np.vstack([self.conteos_par_, np.zeros((len(nuevos_pares), n_clases))])
+
+        indice_region = {r: i for i, r in enumerate(self.regiones_)}
+        indice_par = {p: i for i, p in enumerate(self.pares_)}
+        np.add.at(self.conteos_region_, ([indice_region[r] for r in regiones], y), 1)
+        np.add.at(self.conteos_par_, ([indice_par[p] for p in pares], y), 1)
+
+        self._calcular_probabilidades()
+        return self
+
+    def _calcular_probabilidades(self):
+        conteos_globales = self.conteos_region_.sum(axis=0)
+        self.proba_global_ = conteos_globales / conteos_globales.sum()
+
+        self.proba_region_ = (
+            (self.conteos_region_ + self.beta * self.proba_global_)
+            / (self.conteos_region_.sum(axis=1, keepdims=True) + self.beta)
+        )
+
+        indice_region = {r: i for i, r in enumerate(self.regiones_)}
+        prior = self.proba_region_[[indice_region[r] for r, _ in self.pares_]]
+        self.proba_par_ = (
+            (self.conteos_par_ + self.alpha * prior)
+            / (self.conteos_par_.sum(axis=1, keepdims=True) + self.alpha)
+        )
+
+        self._indexar()
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+
+def entrenar_modelo_frecuencias(file_path, salida="modelo_frecuencias.npz"):
+    """Entrena el modelo de frecuencias con todos los registros y lo guarda"""
+    X, y = preparar_datos(cargar_datos(file_path))
+    if X is None:
+        return None, None
+
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    modelo = ModeloFrecuencias().fit(X, y_encoded, n_clases=len(le.classes_))
+    guardar_version(modelo, le.classes_, salida)
+    return modelo, le
+
+
+def guardar_version(modelo, clases, salida):
+    """
+    Guarda <salida sin .npz>.vNNNN.npz y la publica como `salida`.
+    La publicación es un os.replace atómico, así que quien lea `salida`
+    nunca ve un archivo a medio escribir.
+    """
+    import shutil
+
+    base = os.path.splitext(salida)[0]
+    versionado = f"{base}.v{modelo.version_:04d}.npz"
+    temporal = f"{base}.tmp.npz"
+
+    modelo.guardar(versionado, clases)
+    shutil.copyfile(versionado, temporal)
+    os.replace(temporal, salida)
+    print(f"\nModelo de frecuencias v{modelo.version_} guardado en {versionado} "
+          f"({os.path.getsize(salida) / 1024:.0f} KB) y publicado como {salida}")
+
+
+def leer_registros(ruta):
+    """Lee registros nuevos de EM-DAT (.xlsx o .csv) con las columnas usadas"""
+    if ruta.lower().endswith(".csv"):
+        return pd.read_csv(ruta, usecols=COLUMNAS)
+    return pd.read_excel(ruta, usecols=COLUMNAS)
+
+
+def actualizar_modelo_frecuencias(ruta_nuevos, modelo_path="modelo_frecuencias.npz"):
+    """
+    Suma solo los registros nuevos a los conteos del modelo existente y
+    publica una nueva versión. El costo depende del tamaño de los nuevos
+    registros, no del histórico; el resultado es el mismo que reentrenar
+    con todo. Un archivo que ya se sumó antes se ignora.
+    """
+    modelo = ModeloFrecuencias.cargar(modelo_path)
+    clases = modelo.clases_
+
+    hash_nuevos = _hash_archivo(ruta_nuevos)
+    if hash_nuevos in modelo.deltas_:
+        print(f"{ruta_nuevos} ya se había sumado al modelo (v{modelo.version_}). Nada que hacer.")
+        return modelo
+
+    nuevos = limpiar_datos(leer_registros(ruta_nuevos))
+
+    # Los tipos de desastre los fija el codificador; uno nuevo requiere reentrenar
+    desconocidos = nuevos[~nuevos[TARGET].isin(clases)]
+    if not desconocidos.empty:
+        print(f"Se ignoran {len(desconocidos)} registros con tipos de desastre nuevos: "
+              f"{sorted(desconocidos[TARGET].unique())}")
+        nuevos = nuevos[nuevos[TARGET].isin(clases)]
+
+    if nuevos.empty:
+        print("No hay registros nuevos utilizables.")
+        return modelo
+
+    indice_clase = {c: i for i, c in enumerate(clases)}
+    modelo.actualizar(nuevos[FEATURES], nuevos[TARGET].map(indice_clase).to_numpy())
+    modelo.version_ += 1
+    modelo.deltas_.append(hash_nuevos)
+
+    print(f"Se sumaron {len(nuevos)} registros nuevos.")
+    guardar_version(modelo, clases, modelo_path)
+    return modelo
+
+
+def comparar_modelos(file_path):
+    """
+    Compara RandomForest y frecuencias con la misma división 70/30:
+    accuracy, log-loss, tiempo de entrenamiento, latencia y tamaño.
+    """
+    import pickle
+    import tempfile
+    import time
+    from sklearn.metrics import log_loss
+
+    X, y = preparar_datos(cargar_datos(file_path))
+    if X is None:
+        return
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+    n_clases = len(le.classes_)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y_encoded, test_size=0.3, random_state=42, stratify=y_encoded
+    )
+    fila = X_test.iloc[:1]
+
+    def medir(nombre, modelo, tamano):
+        probabilidades = modelo.predict_proba(X_test)
+        if probabilidades.shape[1] != n_clases:
+            probabilidades = _expandir_probabilidades(probabilidades, modelo.classes_, n_clases)
+
+        inicio = time.perf_counter()
+        for _ in range(50):
+            modelo.predict_proba(fila)
+        latencia = (time.perf_counter() - inicio) / 50
+
+        return {
+            'modelo': nombre,
+            'accuracy': accuracy_score(y_test, probabilidades.argmax(axis=1)),
+            'log_loss': log_loss(y_test, probabilidades, labels=np.arange(n_clases)),
+            'latencia_fila_ms': latencia * 1e3,
+            'tamano_kb': tamano / 1024,
+        }
+
+    inicio = time.perf_counter()
+    pipeline = crear_pipeline().fit(X_train, y_train)
+    fit_rf = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    frecuencias = ModeloFrecuencias().fit(X_train, y_train, n_clases=n_clases)
+    fit_freq = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "frecuencias.npz")
+        frecuencias.guardar(ruta, le.classes_)
+        tamano_freq = os.path.getsize(ruta)
+
+    resultados = [
+        {**medir('RandomForest', pipeline, len(pickle.dumps(pipeline))), 'entrenamiento_s': fit_rf},
+        {**medir('Frecuencias', frecuencias, tamano_freq), 'entrenamiento_s': fit_freq},
+    ]
+
+    print(f"\n{'modelo':<14} {'acc':>7} {'logloss':>8} {'fit s':>8} {'fila ms':>8} {'KB':>8}")
+    for r in resultados:
+        print(f"{r['modelo']:<14} {r['accuracy']:>7.2%} {r['log_loss']:>8.4f} "
+              f"{r['entrenamiento_s']:>8.3f} {r['latencia_fila_ms']:>8.3f} {r['tamano_kb']:>8.0f}")
+    return resultados
+
+
+# --- Modelo compilado (inferencia sin pandas ni scikit-learn) ---
+
+class ModeloCompilado(BosqueCompilado):
+    """
+    Exporta el pipeline entrenado (ColumnTransformer + bosque de árboles) a
+    arreglos NumPy planos. La predicción, guardar y cargar (formato .npz
+    que también lee main.py) están en modelos_npz.BosqueCompilado.
+    """
+
+    @classmethod
+    def desde_pipeline(cls, pipeline, clases):
+        from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+        preprocesador = pipeline.named_steps['preprocessor']
+        bosque = pipeline.named_steps['model']
+        modelo = cls()
+        modelo.clases_ = [str(c) for c in clases]
+        modelo.n_columnas_ = sum(
+            s.stop - s.start for s in preprocesador.output_indices_.values()
+        )
+
+        modelo.categoricas_, modelo.categorias_, modelo.columnas_categoria_ = [], [], []
+        modelo.numericas_, modelo.columnas_numericas_, modelo.medias_, modelo.escalas_ = [], [], [], []
+        for nombre, transformador, columnas in preprocesador.transformers_:
+            inicio = preprocesador.output_indices_[nombre].start
+            if transformador == 'drop' or len(columnas) == 0:
+                continue
+            if isinstance(transformador, OneHotEncoder):
+                if transformador.drop is not None or getattr(transformador, 'infrequent_categories_', None) is not None:
+                    raise ValueError("OneHotEncoder con drop o categorías infrecuentes no está soportado")
+                for columna, categorias in zip(columnas, transformador.categories_):
+                    modelo.categoricas_.append(columna)
+                    modelo.categorias_.append([str(c) for c in categorias])
+                    modelo.columnas_categoria_.append(inicio)
+                    inicio += len(categorias)
+            elif (transformador == 'passthrough' or isinstance(transformador, StandardScaler)
+                  or (isinstance(transformador, FunctionTransformer) and transformador.func is None)):
+                # 'passthrough' ya ajustado aparece como FunctionTransformer identidad
+                escalador = transformador if isinstance(transformador, StandardScaler) else None
+                for j, columna in enumerate(columnas):
+                    modelo.numericas_.append(columna)
+                    modelo.columnas_numericas_.append(inicio + j)
+                    media = escalador.mean_[j] if escalador is not None and escalador.with_mean else 0.0
+                    escala = escalador.scale_[j] if escalador is not None and escalador.with_std else 1.0
+                    modelo.medias_.append(float(media))
+                    modelo.escalas_.append(float(escala))
+            else:
+                raise ValueError(f"Transformador no soportado: {type(transformador).__name__}")
+
+        # Todos los nodos en arreglos planos; los hijos apuntan a índices globales
+        features, umbrales, izquierdos, derechos, valores, raices = [], [], [], [], [], []
+        desplazamiento = 0
+        for arbol in bosque.estimators_:
+            t = arbol.tree_
+            valor = t.value[:, 0, :]
+            suma = valor.sum(axis=1, keepdims=True)
+            raices.append(desplazamiento)
+            features.append(t.feature)
+            umbrales.append(t.threshold)
+            izquierdos.append(np.where(t.children_left >= 0, t.children_left + desplazamiento, -1))
+            derechos.append(np.where(t.children_right >= 0, t.children_right + desplazamiento, -1))
+            valores.append(np.divide(valor, suma, out=np.zeros_like(valor), where=suma > 0))
+            desplazamiento += t.node_count
+
+        modelo.feature_ = np.concatenate(features).astype(np.int32)
+        modelo.umbral_ = np.concatenate(umbrales)
+        modelo.izquierdo_ = np.concatenate(izquierdos).astype(np.int32)
+        modelo.derecho_ = np.concatenate(derechos).astype(np.int32)
+        modelo.valor_ = np.concatenate(valores)
+        modelo.raices_ = np.asarray(raices, dtype=np.int32)
+        modelo._preparar()
+        return modelo
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+
+def compilar_modelo(modelo_path="modelo_desastres.pkl", codificador_path="codificador_labels.pkl",
+                    salida="modelo_compilado.npz", file_path=None):
+    """
+    Exporta modelo_desastres.pkl a `salida` (para MODEL_BACKEND=compiled) y
+    comprueba que sus probabilidades coinciden con las del pipeline.
+    """
+    import joblib
+    import time
+
+    pipeline = joblib.load(modelo_path)
+    codificador = joblib.load(codificador_path)
+    bosque = pipeline.named_steps['model']
+    clases = np.asarray(codificador.classes_)[bosque.classes_]
+
+    compilado = ModeloCompilado.desde_pipeline(pipeline, clases)
+    compilado.guardar(salida)
+    compilado = ModeloCompilado.cargar(salida)
+
+    # Verificación: todos los pares conocidos más algunos desconocidos
+    if file_path is not None:
+        X, _ = preparar_datos(cargar_datos(file_path))
+        X = X.drop_duplicates()
+    else:
+        regiones, paises = pipeline.named_steps['preprocessor'].named_transformers_['cat'].categories_
+        X = pd.DataFrame([(r, p) for r in regiones for p in paises], columns=FEATURES)
+    X = pd.concat([X, pd.DataFrame({'Region': ['Asia', 'Atlantis'], 'Country': ['Atlantis', 'Japan']})],
+                  ignore_index=True)
+
+    # Lote (recorrido vectorizado) y pocas filas (recorrido en Python)
+    diferencia = max(
+        np.abs(pipeline.predict_proba(X) - compilado.predict_proba(X)).max(),
+        np.abs(pipeline.predict_proba(X.iloc[-3:]) - compilado.predict_proba(X.iloc[-3:])).max(),
+    )
+    if diferencia > 1e-9:
+        raise ValueError(f"El modelo compilado no coincide con el pipeline (diferencia {diferencia:.2e})")
+
+    fila = X.iloc[:1]
+    fila_dict = {c: list(fila[c]) for c in FEATURES}
+    lote = {c: list(X[c].iloc[:500]) for c in FEATURES}
+    tiempos = {}
+    for nombre, funcion in [
+        ('pipeline 1 fila', lambda: pipeline.predict_proba(fila)),
+        ('compilado 1 fila', lambda: compilado.predict_proba(fila_dict)),
+        ('pipeline 500 filas', lambda: pipeline.predict_proba(X.iloc[:500])),
+        ('compilado 500 filas', lambda: compilado.predict_proba(lote)),
+    ]:
+        inicio = time.perf_counter()
+        for _ in range(20):
+            funcion()
+        tiempos[nombre] = (time.perf_counter() - inicio) / 20 * 1e3
+
+    print(f"\nModelo compilado guardado en {salida} ({os.path.getsize(salida) / 1024:.0f} KB, "
+          f"{len(compilado.raices_)} árboles, {len(compilado.feature_)} nodos)")
+    print(f"Diferencia máxima con predict_proba en {len(X)} filas: {diferencia:.2e}")
+    for nombre, ms in tiempos.items():
+        print(f"  {nombre:<20} {ms:8.3f} ms")
+    return compilado
+
+
+# --- Selección de modelo (búsqueda de hiperparámetros en paralelo) ---
+
+# Candidatos por defecto para RandomForestClassifier
+GRID_POR_DEFECTO = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 20],
+    'min_samples_leaf': [1, 5],
+}
+
+# Matriz de diseño compartida por cada proceso del pool (se envía una sola vez)
+_X_compartida = None
+_y_compartida = None
+_n_clases = None
+
+
+def _iniciar_proceso(X, y, n_clases):
+    global _X_compartida, _y_compartida, _n_clases
+    _X_compartida, _y_compartida, _n_clases = X, y, n_clases
+
+
+def _expandir_probabilidades(probabilidades, clases_modelo, n_clases):
+    """Reordena predict_proba a todas las clases (un fold puede no verlas todas)"""
+    completas = np.zeros((probabilidades.shape[0], n_clases))
+    completas[:, clases_modelo] = probabilidades
+    return completas
+
+
+def _evaluar_candidato(params, folds):
+    """Validación cruzada de un candidato sobre la matriz compartida"""
+    import pickle
+    import time
+    from sklearn.metrics import log_loss
+
+    X, y = _X_compartida, _y_compartida
+    resultados = []
+    for train_idx, test_idx in folds:
+        modelo = RandomForestClassifier(random_state=42, n_jobs=1, **params)
+
+        inicio = time.perf_counter()
+        modelo.fit(X[train_idx], y[train_idx])
+        tiempo_fit = time.perf_counter() - inicio
+
+        X_test = X[test_idx]
+        inicio = time.perf_counter()
+        probabilidades = modelo.predict_proba(X_test)
+        tiempo_lote = time.perf_counter() - inicio
+
+        # Latencia de una sola fila (el caso de la API)
+        fila = X_test[:1]
+        inicio = time.perf_counter()
+        for _ in range(20):
+            modelo.predict_proba(fila)
+        latencia_fila = (time.perf_counter() - inicio) / 20
+
+        probabilidades = _expandir_probabilidades(probabilidades, modelo.classes_, _n_clases)
+        resultados.append({
+            'accuracy': accuracy_score(y[test_idx], probabilidades.argmax(axis=1)),
+            'log_loss': log_loss(y[test_idx], probabilidades, labels=np.arange(_n_clases)),
+            'tiempo_entrenamiento_s': tiempo_fit,
+            'latencia_lote_us_por_fila': tiempo_lote / len(test_idx) * 1e6,
+            'latencia_fila_ms': latencia_fila * 1e3,
+            'tamano_kb': len(pickle.dumps(modelo)) / 1024,
+        })
+
+    promedio = {k: float(np.mean([r[k] for r in resultados])) for k in resultados[0]}
+    promedio['log_loss_std'] = float(np.std([r['log_loss'] for r in resultados]))
+    return {'params': params, **promedio}
+
+
+def seleccionar_modelo(file_path, grid=None, n_folds=5, procesos=None,
+                       salida="seleccion_modelos.json"):
+    """
+    Busca hiperparámetros del RandomForest con validación cruzada
+    estratificada, en paralelo. El one-hot se calcula una sola vez (matriz
+    dispersa) y se comparte con todos los procesos junto con los folds, así
+    que ningún candidato repite la codificación ni la división.
+    Guarda los resultados (calidad y costo de cada candidato) en JSON.
+    """
+    import itertools
+    import json
+    from concurrent.futures import ProcessPoolExecutor
+    from sklearn.model_selection import StratifiedKFold
+
+    df = cargar_datos(file_path)
+    X, y = preparar_datos(df)
+    if X is None:
+        return []
+
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    # Codificar una sola vez (CSR para poder indexar filas de cada fold)
+    X_sparse = OneHotEncoder(handle_unknown='ignore').fit_transform(X).tocsr()
+    print(f"\nMatriz de diseño: {X_sparse.shape[0]} filas x {X_sparse.shape[1]} columnas (dispersa)")
+
+    # Clases con menos registros que folds no se pueden estratificar bien
+    n_folds = min(n_folds, int(np.bincount(y_encoded).min()))
+    n_folds = max(n_folds, 2)
+    folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42).split(X_sparse, y_encoded))
+
+    grid = grid or GRID_POR_DEFECTO
+    nombres = list(grid)
+    candidatos = [dict(zip(nombres, valores)) for valores in itertools.product(*grid.values())]
+    print(f"Evaluando {len(candidatos)} candidatos con {n_folds}-fold CV...")
+
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        initializer=_iniciar_proceso,
+        initargs=(X_sparse, y_encoded, len(le.classes_))
+    ) as pool:
+        resultados = list(pool.map(_evaluar_candidato, candidatos, itertools.repeat(folds)))
+
+    resultados.sort(key=lambda r: r['log_loss'])
+
+    print(f"\n{'params':<65} {'acc':>7} {'logloss':>8} {'fit s':>7} {'fila ms':>8} {'KB':>8}")
+    for r in resultados:
+        print(f"{str(r['params']):<65} {r['accuracy']:>7.2%} {r['log_loss']:>8.4f} "
+              f"{r['tiempo_entrenamiento_s']:>7.2f} {r['latencia_fila_ms']:>8.2f} {r['tamano_kb']:>8.0f}")
+
+    with open(salida, 'w') as f:
+        json.dump({'n_folds': n_folds, 'resultados': resultados}, f, indent=2)
+    print(f"\nResultados guardados en {salida}")
+    return resultados
+
+
 def predecir_desastres_usuario(pipeline, label_encoder):
     """
     Pide al usuario una Región y País y muestra las probabilidades de desastre.
@@ -175,25 +757,52 @@ def predecir_desastres_usuario(pipeline, label_encoder):
 nombre_archivo = "public_emdat_custom_request_2025-10-26_4a89000d-cedd-4bd7-b279-71aa2a2f6035.xlsx"
 
 
-# Cargar el DataFrame global para los ejemplos (solo lectura)
-try:
-    df = pd.read_excel(nombre_archivo)
-except Exception:
-    df = pd.DataFrame(columns=['Region', 'Country'])
+if __name__ == "__main__" and "--seleccionar" in sys.argv:
+    # Búsqueda de hiperparámetros: python entrenar.py --seleccionar
+    seleccionar_modelo(nombre_archivo)
 
-# 1. Entrenar el modelo
-modelo_entrenado, codificador_labels = entrenar_modelo_desastres(nombre_archivo)
+elif __name__ == "__main__" and "--frecuencias" in sys.argv:
+    # Modelo de conteos para MODEL_BACKEND=frequency: python entrenar.py --frecuencias
+    entrenar_modelo_frecuencias(nombre_archivo)
 
-# 2. Iniciar el modo de predicción interactivo
-if modelo_entrenado:
-    predecir_desastres_usuario(modelo_entrenado, codificador_labels)
+elif __name__ == "__main__" and "--actualizar" in sys.argv:
+    # Sumar registros nuevos al modelo de frecuencias:
+    # python entrenar.py --actualizar nuevos_registros.xlsx
+    actualizar_modelo_frecuencias(sys.argv[sys.argv.index("--actualizar") + 1])
 
-# --- Guardar el modelo entrenado para usarlo en la interfaz ---
-import joblib
+elif __name__ == "__main__" and "--compilar" in sys.argv:
+    # Exportar modelo_desastres.pkl para MODEL_BACKEND=compiled: python entrenar.py --compilar
+    compilar_modelo(file_path=nombre_archivo)
 
-if modelo_entrenado and codificador_labels:
-    joblib.dump(modelo_entrenado, "modelo_desastres.pkl")
-    joblib.dump(codificador_labels, "codificador_labels.pkl")
-    print("\n Modelo y codificador guardados correctamente (archivos .pkl creados).")
-else:
-    print("\n No se pudo guardar el modelo porque no se entrenó correctamente.")
+elif __name__ == "__main__" and "--catalogo" in sys.argv:
+    # Regenerar paises_por_region.json: python entrenar.py --catalogo
+    guardar_catalogo(preparar_datos(cargar_datos(nombre_archivo))[0])
+
+elif __name__ == "__main__" and "--comparar" in sys.argv:
+    # RandomForest vs frecuencias: python entrenar.py --comparar
+    comparar_modelos(nombre_archivo)
+
+elif __name__ == "__main__":
+    # Cargar el DataFrame global para los ejemplos (solo lectura)
+    try:
+        df = cargar_datos(nombre_archivo)
+    except Exception:
+        df = pd.DataFrame(columns=['Region', 'Country'])
+
+    # 1. Entrenar el modelo
+    modelo_entrenado, codificador_labels = entrenar_modelo_desastres(nombre_archivo)
+
+    # 2. Iniciar el modo de predicción interactivo
+    if modelo_entrenado:
+        predecir_desastres_usuario(modelo_entrenado, codificador_labels)
+
+    # --- Guardar el modelo entrenado para usarlo en la interfaz ---
+    import joblib
+
+    if modelo_entrenado and codificador_labels:
+        joblib.dump(modelo_entrenado, "modelo_desastres.pkl")
+        joblib.dump(codificador_labels, "codificador_labels.pkl")
+        print("\n Modelo y codificador guardados correctamente (archivos .pkl creados).")
+        guardar_catalogo(preparar_datos(df)[0])
+    else:
+        print("\n No se pudo guardar el modelo porque no se entrenó correctamente.")
@@ -0,0 +1,117 @@
+"""
+Local stand-in for the NASA EONET API
+Serves synthetic open events so main.py can be exercised without network access
+
+Usage:
+    python AI/eonet_stub.py --port 9000 --events 300 --delay 0.05
+    EONET_BASE_URL=http://127.0.0.1:9000/api EONET_USE_PROXIES=0 uvicorn AI.main:app
+    curl -X POST http://127.0.0.1:9000/api/events    # open one more event
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import random
+import time
+
+CATEGORIES = ["wildfires", "severeStorms", "volcanoes", "floods", "seaLakeIce", "earthquakes"]
+
+
+def make_event(i, rng):
+    """One EONET v3 style event with a random category and position"""
+    category = rng.choice(CATEGORIES)
+    return {
+        "id": f"EONET_{i:05d}",
+        "title": f"Stub {category} event {i}",
+        "description": None,
+        "link": f"http://127.0.0.1/api/v3/events/EONET_{i:05d}",
+        "closed": None,
+        "categories": [{"id": category, "title": category}],
+        "sources": [{"id": "STUB", "url": f"https://example.org/{i}"}],
+        "geometry": [{
+            "magnitudeValue": None,
+            "magnitudeUnit": None,
+            "date": "2025-11-01T00:00:00Z",
+            "type": "Point",
+            "coordinates": [round(rng.uniform(-180, 180), 4), round(rng.uniform(-85, 85), 4)]
+        }]
+    }
+
+
+def make_events(count, seed=42):
+    """Build `count` EONET v3 style events with random positions"""
+    rng = random.Random(seed)
+    return [make_event(i, rng) for i in range(count)]
+
+
+class EonetStubHandler(BaseHTTPRequestHandler):
+    events = []
+    delay = 0.0
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if not parsed.path.rstrip("/").endswith("/events"):
+            self.send_error(404)
+            return
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        params = parse_qs(parsed.query)
+        limit = int(params.get("limit", [len(self.events)])[0])
+        body = json.dumps({
+            "title": "EONET Events (stub)",
+            "events": self.events[:limit]
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """Open one more event, so the next sync has a change to report"""
+        if not urlparse(self.path).path.rstrip("/").endswith("/events"):
+            self.send_error(404)
+            return
+
+        i = len(self.events)
+        event = make_event(i, random.Random(i))
+        self.events.append(event)
+        body = json.dumps(event).encode("utf-8")
+
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local EONET stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--events", type=int, default=300, help="Number of synthetic events")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args()
+
+    EonetStubHandler.events = make_events(args.events)
+    EonetStubHandler.delay = args.delay
+
+    server = ThreadingHTTPServer((args.host, args.port), EonetStubHandler)
+    print(f"🛰️  EONET stub serving {args.events} events on http://{args.host}:{args.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
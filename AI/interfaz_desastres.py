@@ -2,12 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import pandas as pd
 import joblib
+from entrenar import cargar_datos, nombre_archivo
 
 # --- Cargar el modelo y los datos ---
 try:
     modelo = joblib.load("modelo_desastres.pkl")
     label_encoder = joblib.load("codificador_labels.pkl")
-    df = pd.read_excel("public_emdat_custom_request_2025-10-26_4a89000d-cedd-4bd7-b279-71aa2a2f6035.xlsx")
+    df = cargar_datos(nombre_archivo)  # usa la caché .npz si el Excel no cambió
 except Exception as e:
     messagebox.showerror("Error", f"No se pudo cargar el modelo o los datos.\n\n{e}")
     raise SystemExit
@@ -3,19 +3,63 @@ iAlert - FastAPI Server for Disaster Predictions
 Handles chatbot and ML model predictions
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import joblib
-import pandas as pd
-from typing import Dict, List
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+import numpy as np
+from typing import Dict, List, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+import asyncio
+import base64
+import bisect
+import gc
+import gzip
+import hashlib
+import hmac
+import httpx
+import json
+import math
+import orjson
 import os
+import random
+import re
+import sys
+import threading
+import time
+import unicodedata
+
+# Pandas-free readers for the .npz models written by entrenar.py
+try:
+    from .modelos_npz import BosqueCompilado, FrecuenciasNpz
+except ImportError:   # run from inside AI/ (uvicorn main:app)
+    from modelos_npz import BosqueCompilado, FrecuenciasNpz
+
+# Startup and shutdown
+# The model loads in a background thread so the port opens right away;
+# /api/ready reports when predictions can be served.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await load_model_and_data()
+    await start_model_watcher()
+    await start_loop_lag_monitor()
+    await start_background_refresh()
+    yield
+    await stop_background_refresh()
+    await stop_loop_lag_monitor()
+    await stop_model_watcher()
+    await close_http_client()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="iAlert AI Service",
     description="Disaster prediction and chatbot API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration - allows requests from your mobile app
@@ -28,11 +72,318 @@ app.add_middleware(
 )
 
 # Global variables for model and data
-modelo = None
-codificador = None
-countries_by_continent = {}
+# Loaded model version (model, label encoder, precomputed predictions, ...)
+# Hot reload replaces the whole dict in one assignment, so a request that
+# picked up a bundle keeps using one consistent set of objects.
+_model_bundle: Optional[dict] = None
+
+# Model backend: "forest" (RandomForest pipeline, default),
+# "frequency" (count-based model from `python entrenar.py --frecuencias`) or
+# "compiled" (the forest exported to NumPy by `python entrenar.py --compilar`)
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "forest")
+
+# Precomputed prediction matrix
+# The model only sees Region + Country, so every known pair is scored once
+# when the model loads and requests are answered with a row lookup.
+# Stored in the bundle as "matrix" (n_pairs x n_classes) and "index"
+# ((region, country) -> row).
+
+# Model loading at startup: "background" (default) opens the port at once and
+# loads + warms up the model in a worker thread; "blocking" finishes loading
+# before the server accepts requests
+MODEL_LOAD_MODE = os.environ.get("MODEL_LOAD_MODE", "background")
+# Seconds a prediction request waits for a model that is still loading
+MODEL_LOAD_WAIT = float(os.environ.get("MODEL_LOAD_WAIT", "30"))
+_model_loading: Optional[asyncio.Task] = None
+_model_load_error: Optional[str] = None
+_process_started = time.time()
+
+# Hot reload: poll the model files every N seconds (0 disables the watcher)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "0"))
+# Required in the X-Admin-Token header of admin endpoints (unset disables them)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Prometheus metrics, served in the text exposition format at /metrics
+# Kept in plain dicts (no client library); with several workers each
+# process reports its own numbers, like the cache counters.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+LOOP_LAG_INTERVAL = 0.5   # seconds between event-loop lag probes
+
+_metrics = {
+    "histograms": {},   # (name, labels) -> {"buckets", "counts", "sum", "count"}
+    "counters": {}      # (name, labels) -> value
+}
+_metric_help = {
+    "ialert_http_request_duration_seconds": ("histogram", "Time until the response headers are sent, per endpoint"),
+    "ialert_stage_duration_seconds": ("histogram", "Time spent in each internal processing stage"),
+    "ialert_upstream_request_duration_seconds": ("histogram", "EONET request latency per upstream endpoint"),
+    "ialert_upstream_requests_total": ("counter", "EONET requests per upstream endpoint and outcome"),
+    "ialert_inference_batch_size": ("histogram", "Region/country pairs scored per inference call"),
+    "ialert_event_loop_lag_seconds": ("histogram", "Delay of the event loop in waking a sleeping task"),
+    "ialert_disasters_cache_lookups_total": ("counter", "Disasters cache lookups by result"),
+    "ialert_disasters_cache_entries": ("gauge", "Entries in the disasters cache"),
+    "ialert_open_events": ("gauge", "Open events in the local EONET store"),
+    "ialert_stream_subscribers": ("gauge", "Connected /api/disasters/stream clients"),
+    "ialert_model_info": ("gauge", "Loaded model version")
+}
+_loop_lag_monitor: Optional[asyncio.Task] = None
+
+def _observe(name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels):
+    """Record one value in a histogram"""
+    key = (name, tuple(sorted(labels.items())))
+    histogram = _metrics["histograms"].get(key)
+    if histogram is None:
+        histogram = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+        _metrics["histograms"][key] = histogram
+    histogram["counts"][bisect.bisect_left(histogram["buckets"], value)] += 1
+    histogram["sum"] += value
+    histogram["count"] += 1
+
+def _count(name: str, amount: float = 1, **labels):
+    """Increment a counter"""
+    key = (name, tuple(sorted(labels.items())))
+    _metrics["counters"][key] = _metrics["counters"].get(key, 0) + amount
+
+@contextmanager
+def _timed(stage: str):
+    """Time a block as ialert_stage_duration_seconds{stage=...}"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _observe("ialert_stage_duration_seconds", time.perf_counter() - start, stage=stage)
+
+def _format_labels(labels: tuple) -> str:
+    """{k="v",...} with backslashes, quotes and newlines escaped"""
+    if not labels:
+        return ""
+    escaped = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{k}="{v}"')
+    return "{" + ",".join(escaped) + "}"
+
+def _render_metrics() -> str:
+    """All metrics in the Prometheus text format"""
+    cache = _disasters_cache
+    series = {name: [] for name in _metric_help}   # name -> [(suffix, labels, value)]
+    
+    for (name, labels), value in _metrics["counters"].items():
+        series[name].append(("", labels, value))
+    for (name, labels), histogram in _metrics["histograms"].items():
+        cumulative = 0
+        for bound, count in zip(histogram["buckets"] + ("+Inf",), histogram["counts"]):
+            cumulative += count
+            series[name].append(("_bucket", labels + (("le", bound),), cumulative))
+        series[name].append(("_sum", labels, histogram["sum"]))
+        series[name].append(("_count", labels, histogram["count"]))
+    
+    for result, field in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses")):
+        series["ialert_disasters_cache_lookups_total"].append(("", (("result", result),), cache[field]))
+    series["ialert_disasters_cache_entries"].append(("", (), len(cache["entries"])))
+    series["ialert_open_events"].append(("", (), len(_event_store["open_events"])))
+    series["ialert_stream_subscribers"].append(("", (), len(_subscribers)))
+    bundle = _model_bundle
+    if bundle is not None:
+        series["ialert_model_info"].append(("", (("backend", MODEL_BACKEND), ("version", bundle["version"])), 1))
+    
+    lines = []
+    for name, (kind, help_text) in _metric_help.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in series[name]:
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """
+    Time every HTTP request per route template (not per raw path, so ids
+    and query strings do not create new series). The time is taken when
+    the response headers go out, so long-lived SSE streams only count
+    their setup.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        observed = False
+        
+        def observe(status: int):
+            route = scope.get("route")
+            _observe(
+                "ialert_http_request_duration_seconds",
+                time.perf_counter() - start,
+                method=scope["method"],
+                endpoint=route.path if route is not None else "unmatched",
+                status=str(status)
+            )
+        
+        async def send_with_metrics(message):
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                observe(message["status"])
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not observed:
+                observe(500)
+
+app.add_middleware(MetricsMiddleware)
+
+async def _monitor_loop_lag():
+    """Measure how late the event loop wakes a task that sleeps LOOP_LAG_INTERVAL"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        _observe("ialert_event_loop_lag_seconds", max(0.0, loop.time() - start - LOOP_LAG_INTERVAL))
+
+# Opt-in per-request profiling
+# A sampling thread snapshots the event-loop thread's stack while a request
+# runs and writes the samples in the folded-stack format (one
+# "frame;frame;frame count" line per stack), which flamegraph.pl,
+# speedscope and inferno open directly. The loop thread is shared by every
+# in-flight request, so only samples taken while the profiled request's own
+# coroutine is running are kept; work it hands to asyncio.to_thread runs on
+# other threads and is not sampled. Nothing is installed unless
+# PROFILE_SAMPLE_RATE > 0 or PROFILE_HEADER=1, so it costs nothing when off.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))   # fraction of requests profiled
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "0") == "1"   # X-Profile: 1 (+ X-Admin-Token)
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "100"))   # oldest profiles are deleted
+# The sampler needs the GIL to read the stack, and a busy loop thread only
+# gives it up every switch interval (5 ms by default), so sampling faster
+# than that just yields fewer, irregular samples
+PROFILE_INTERVAL = sys.getswitchinterval()    # seconds between stack samples
+PROFILE_MAX_SECONDS = 30    # stop sampling long requests (e.g. SSE streams)
+
+_profiler_busy = threading.Lock()   # one profiled request at a time
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class RequestProfiler(threading.Thread):
+    """
+    Sample one thread's stack until stopped, then write a .folded file.
+    Samples whose stack does not pass through request_frame belong to
+    another coroutine sharing the thread and are only counted.
+    """
+    
+    def __init__(self, target_thread: int, request_frame, path: str):
+        super().__init__(daemon=True)
+        self.target_thread = target_thread
+        self.request_frame = request_frame
+        self.path = path
+        self.started = time.perf_counter()
+        self.stacks: Dict[str, int] = {}
+        self.other_samples = 0
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        try:
+            deadline = self.started + PROFILE_MAX_SECONDS
+            while not self.stop_event.wait(PROFILE_INTERVAL) and time.perf_counter() < deadline:
+                frame = sys._current_frames().get(self.target_thread)
+                stack = []
+                ours = False
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    ours = ours or frame is self.request_frame
+                    frame = frame.f_back
+                if not ours:
+                    self.other_samples += 1
+                    continue
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self._write()
+        finally:
+            self.request_frame = None
+            _profiler_busy.release()
+    
+    def _write(self):
+        elapsed = time.perf_counter() - self.started
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(self.path, "w") as f:
+            if not self.stacks:
+                # X-Profile-File already named this file, so it must exist even
+                # when the request was too short (or only awaited) to be sampled
+                f.write(f"# no samples in {elapsed:.3f}s ({self.other_samples} from other requests skipped)\n")
+            for stack, count in self.stacks.items():
+                f.write(f"{stack} {count}\n")
+        
+        # Keep the directory bounded
+        profiles = sorted(
+            os.path.join(PROFILE_DIR, name)
+            for name in os.listdir(PROFILE_DIR) if name.endswith(".folded")
+        )
+        for old in profiles[:-PROFILE_MAX_FILES]:
+            os.remove(old)
+        
+        samples = sum(self.stacks.values())
+        print(f"🔬 Profile written to {self.path} ({samples} samples, {self.other_samples} from other requests skipped, {elapsed:.3f}s)")
+
+class ProfilingMiddleware:
+    """
+    Profile sampled requests (PROFILE_SAMPLE_RATE) and requests sent with
+    X-Profile: 1 plus a valid X-Admin-Token (PROFILE_HEADER=1). The profile
+    file name is returned in the X-Profile-File response header.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    def _wanted(self, scope) -> bool:
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return True
+        if PROFILE_HEADER and ADMIN_TOKEN:
+            headers = dict(scope["headers"])
+            token = headers.get(b"x-admin-token", b"").decode("latin-1")
+            return headers.get(b"x-profile") == b"1" and hmac.compare_digest(token, ADMIN_TOKEN)
+        return False
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope) or not _profiler_busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{scope['method']}-{slug}.folded"
+        # This coroutine's frame is on the loop thread's stack exactly when
+        # the request (not another one sharing the loop) is running
+        profiler = RequestProfiler(threading.get_ident(), sys._getframe(), os.path.join(PROFILE_DIR, name))
+        
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-file", name.encode())]
+            await send(message)
+        
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            profiler.stop_event.set()
+
+if PROFILE_SAMPLE_RATE > 0 or PROFILE_HEADER:
+    app.add_middleware(ProfilingMiddleware)
 
 # Pydantic models for request/response validation
+class UnknownNameError(ValueError):
+    """A region or country the model was not trained on"""
+    def __init__(self, message: str, suggestions: List[str]):
+        super().__init__(message)
+        self.suggestions = suggestions
+
 class PredictionRequest(BaseModel):
     region: str
     country: str
@@ -43,86 +394,446 @@ class PredictionResponse(BaseModel):
     country: str
     predictions: Dict[str, float]
 
-# Load model and prepare data on startup
-@app.on_event("startup")
-async def load_model_and_data():
-    """Load the trained model and prepare country data"""
-    global modelo, codificador, countries_by_continent
+class BatchPredictionRequest(BaseModel):
+    items: List[PredictionRequest]
+
+class BatchPredictionItem(BaseModel):
+    status: str
+    region: str
+    country: str
+    predictions: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+    suggestions: Optional[List[str]] = None
+
+class BatchPredictionResponse(BaseModel):
+    status: str
+    count: int
+    results: List[BatchPredictionItem]
+
+# Largest batch accepted by /api/predict-disaster/batch
+MAX_BATCH_SIZE = 1000
+
+class Zone(BaseModel):
+    user_id: str
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    radius_km: float = Field(500, gt=0)
+    categories: List[str] = []   # EONET category ids, empty means all
+
+class ZoneMatchRequest(BaseModel):
+    zones: List[Zone]
+
+# Largest number of zones accepted by /api/zones/match
+MAX_ZONES = 50000
+ZONE_VALIDATE_CHUNK = 1000     # zones per pydantic call off the event loop
+_zone_list = TypeAdapter(List[Zone])
+
+def _model_input(modelo, columns: Dict[str, list]):
+    """Model input for {column: values}: a DataFrame only for scikit-learn pipelines"""
+    if isinstance(modelo, (FrecuenciasNpz, BosqueCompilado)):
+        return columns
+    import pandas as pd
+    return pd.DataFrame(columns)
+
+def _fitted_categories(modelo):
+    """
+    Return the (regions, countries) vocabularies seen by the fitted
+    OneHotEncoder, or None if the pipeline has an unexpected shape
+    """
+    if isinstance(modelo, (FrecuenciasNpz, BosqueCompilado)):
+        return getattr(modelo, "categories_", None)
+    try:
+        encoder = modelo.named_steps["preprocessor"].named_transformers_["cat"]
+        regions, countries = encoder.categories_
+        return [str(r) for r in regions], [str(c) for c in countries]
+    except Exception:
+        return None
+
+def _build_prediction_matrix(modelo) -> tuple:
+    """Score every known (region, country) pair with one predict_proba call"""
+    categories = _fitted_categories(modelo)
+    if categories is None:
+        print("⚠️ Could not read model categories, predictions will use the model directly")
+        return None, {}
+    
+    regions, countries = categories
+    pairs = [(r, c) for r in regions for c in countries]
+    X = _model_input(modelo, {"Region": [r for r, _ in pairs], "Country": [c for _, c in pairs]})
+    
+    matrix = np.asarray(modelo.predict_proba(X), dtype=np.float64)
+    print(f"✅ Precomputed predictions for {len(pairs)} region/country pairs")
+    return matrix, {pair: i for i, pair in enumerate(pairs)}
+
+def _predict_batch(pairs: List[tuple], bundle: dict) -> np.ndarray:
+    """
+    Probability matrix for a list of (region, country) pairs, in input order
+    Known pairs come from the precomputed matrix; every unknown pair is
+    scored together in a single predict_proba call
+    """
+    matrix, index = bundle["matrix"], bundle["index"]
+    _observe("ialert_inference_batch_size", len(pairs), buckets=BATCH_SIZE_BUCKETS)
+    with _timed("inference_lookup"):
+        rows = [index.get(pair) for pair in pairs]
+        unknown = [i for i, row in enumerate(rows) if row is None]
+        
+        if not unknown:
+            return matrix[rows]
+    
+    with _timed("inference_model"):
+        X = _model_input(bundle["modelo"], {
+            "Region": [pairs[i][0] for i in unknown],
+            "Country": [pairs[i][1] for i in unknown]
+        })
+        fallback = np.asarray(bundle["modelo"].predict_proba(X), dtype=np.float64)
     
+    if len(unknown) == len(pairs):
+        return fallback
+    
+    result = np.empty((len(pairs), fallback.shape[1]), dtype=np.float64)
+    known = [i for i, row in enumerate(rows) if row is not None]
+    result[known] = matrix[[rows[i] for i in known]]
+    result[unknown] = fallback
+    return result
+
+def _predict_probabilities(region: str, country: str, bundle: dict) -> np.ndarray:
+    """Probability vector for one (region, country) pair"""
+    return _predict_batch([(region, country)], bundle)[0]
+
+def _format_predictions(probabilities: np.ndarray, bundle: dict) -> Dict[str, float]:
+    """Map a probability vector to {disaster type: probability}, highest first"""
+    labels = bundle["codificador"].classes_
+    predictions = {
+        labels[i]: float(probabilities[i])
+        for i in range(len(labels))
+    }
+    return dict(sorted(predictions.items(), key=lambda x: x[1], reverse=True))
+
+# Country catalogue
+# Built from the model's fitted categories whenever a model loads, grouped
+# by the region/country pairs seen in training (the frequency model's own
+# pairs, or paises_por_region.json from `python entrenar.py --catalogo`).
+# Names are matched after normalization (casefold, accents and punctuation
+# stripped) and through aliases, so "usa", "United States" and
+# "united states of america" all reach the model as one category.
+CATALOGUE_FILE = "paises_por_region.json"
+MAX_SEARCH_RESULTS = 50
+MAX_SUGGESTIONS = 5    # names offered when a prediction input is unknown
+
+REGION_ALIASES = {
+    "america": "Americas",
+    "north america": "Americas",
+    "south america": "Americas",
+    "central america": "Americas",
+    "latin america": "Americas",
+    "caribbean": "Americas",
+    "australia and oceania": "Oceania",
+}
+
+COUNTRY_ALIASES = {
+    "usa": "United States Of America",
+    "us": "United States Of America",
+    "united states": "United States Of America",
+    "uk": "United Kingdom Of Great Britain And Northern Ireland",
+    "united kingdom": "United Kingdom Of Great Britain And Northern Ireland",
+    "great britain": "United Kingdom Of Great Britain And Northern Ireland",
+    "britain": "United Kingdom Of Great Britain And Northern Ireland",
+    "russia": "Russian Federation",
+    "south korea": "Republic Of Korea",
+    "korea": "Republic Of Korea",
+    "north korea": "Democratic People'S Republic Of Korea",
+    "laos": "Lao People'S Democratic Republic",
+    "vietnam": "Viet Nam",
+    "syria": "Syrian Arab Republic",
+    "tanzania": "United Republic Of Tanzania",
+    "moldova": "Republic Of Moldova",
+    "palestine": "State Of Palestine",
+    "turkey": "Türkiye",
+    "ivory coast": "Côte D’Ivoire",
+    "cape verde": "Cabo Verde",
+    "east timor": "Timor-Leste",
+    "dr congo": "Democratic Republic Of The Congo",
+    "drc": "Democratic Republic Of The Congo",
+    "congo kinshasa": "Democratic Republic Of The Congo",
+    "congo brazzaville": "Congo",
+    "hong kong": "China, Hong Kong Special Administrative Region",
+    "macao": "China, Macao Special Administrative Region",
+    "macau": "China, Macao Special Administrative Region",
+    "czech republic": "Czechia",
+    "swaziland": "Eswatini",
+    "burma": "Myanmar",
+    "macedonia": "North Macedonia",
+    "holland": "Netherlands (Kingdom Of The)",
+    "uae": "United Arab Emirates",
+    "us virgin islands": "United States Virgin Islands",
+}
+
+def _normalize_name(name: str) -> str:
+    """Casefold, strip accents and punctuation ("Côte D’Ivoire" -> "cote d ivoire")"""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text).split())
+
+def _name_variants(name: str) -> List[str]:
+    """Normalized keys for a name: the full name and, if any, the name without (...)"""
+    variants = [_normalize_name(name)]
+    short = _normalize_name(re.sub(r"\(.*?\)", " ", name))
+    if short and short not in variants:
+        variants.append(short)
+    return variants
+
+class CountryTrie:
+    """
+    Prefix trie over normalized country names, aliases and the words inside
+    them. Every node keeps its completions already ranked (full-name
+    matches, then aliases, then word matches), so a lookup is one walk
+    down the query's characters.
+    """
+    
+    def __init__(self):
+        self.root = ({}, {})   # (children by character, {country: rank})
+    
+    def insert(self, key: str, country: str, rank: int):
+        node = self.root
+        for ch in key:
+            children, matches = node
+            if rank < matches.get(country, rank + 1):
+                matches[country] = rank
+            node = children.setdefault(ch, ({}, {}))
+        if rank < node[1].get(country, rank + 1):
+            node[1][country] = rank
+    
+    def freeze(self):
+        """Turn every node's matches into a list sorted by (rank, name)"""
+        stack = [self.root]
+        while stack:
+            children, matches = stack.pop()
+            ranked = sorted(matches.items(), key=lambda item: (item[1], item[0]))
+            matches.clear()
+            matches.update({"ranked": [country for country, _ in ranked]})
+            stack.extend(children.values())
+    
+    def search(self, prefix: str) -> List[str]:
+        node = self.root
+        for ch in prefix:
+            node = node[0].get(ch)
+            if node is None:
+                return []
+        return node[1].get("ranked", [])
+
+def _observed_pairs(modelo) -> List[tuple]:
+    """(region, country) pairs seen in training"""
+    if isinstance(modelo, FrecuenciasNpz):
+        return list(modelo.pares_)
     try:
-        # Load the trained model files
+        with open(CATALOGUE_FILE, encoding="utf-8") as f:
+            return [(region, country) for region, countries in json.load(f).items() for country in countries]
+    except FileNotFoundError:
+        print(f"⚠️ {CATALOGUE_FILE} not found, countries will not be grouped by continent")
+        return []
+
+def _build_catalogue(modelo) -> dict:
+    """Countries the model knows, grouped by region, with a normalized index and a search trie"""
+    categories = _fitted_categories(modelo)
+    regions, countries = categories if categories is not None else ([], [])
+    known = set(countries)
+    
+    by_region = {region: [] for region in regions}
+    country_regions: Dict[str, List[str]] = {}
+    for region, country in _observed_pairs(modelo):
+        if region in by_region and country in known:
+            by_region[region].append(country)
+            country_regions.setdefault(country, []).append(region)
+    for region in by_region:
+        by_region[region].sort()
+    
+    region_index = {_normalize_name(r): r for r in regions}
+    for alias, region in REGION_ALIASES.items():
+        if region in by_region:
+            region_index.setdefault(_normalize_name(alias), region)
+    
+    # Normalized name -> (country, rank): 0 = its own name, 1 = short form or alias
+    country_index = {}
+    for country in countries:
+        for i, key in enumerate(_name_variants(country)):
+            country_index.setdefault(key, (country, min(i, 1)))
+    for alias, country in COUNTRY_ALIASES.items():
+        if country in known:
+            country_index.setdefault(_normalize_name(alias), (country, 1))
+    
+    # Every word suffix is indexed too, so "korea" finds "Republic Of Korea"
+    trie = CountryTrie()
+    for key, (country, rank) in country_index.items():
+        words = key.split()
+        for i in range(len(words)):
+            trie.insert(" ".join(words[i:]), country, rank if i == 0 else 2)
+    trie.freeze()
+    
+    print(f"✅ Catalogue: {len(countries)} countries, {len(country_regions)} grouped across {len(regions)} continents")
+    return {
+        "by_region": by_region,
+        "country_regions": country_regions,
+        "regions": region_index,
+        "countries": {key: country for key, (country, _) in country_index.items()},
+        "trie": trie
+    }
+
+def _resolve_region(name: str, catalogue: dict) -> Optional[str]:
+    """Region name as the model knows it, or None"""
+    return catalogue["regions"].get(_normalize_name(name))
+
+def _resolve_country(name: str, catalogue: dict) -> Optional[str]:
+    """Country name as the model knows it, or None"""
+    return catalogue["countries"].get(_normalize_name(name))
+
+def _suggest_countries(name: str, catalogue: dict, limit: int = MAX_SUGGESTIONS) -> List[str]:
+    """Closest trie matches for an unknown name, shortening it until something matches"""
+    key = _normalize_name(name)
+    while key:
+        found = catalogue["trie"].search(key)
+        if found:
+            return found[:limit]
+        key = key[:-1].rstrip()
+    return []
+
+def _resolve_pair(region: str, country: str, catalogue: dict) -> tuple:
+    """
+    (region, country) as the model knows them
+    Raises UnknownNameError for names the catalogue cannot match, so they
+    never reach the model as unknown categories. A model without fitted
+    categories has an empty catalogue; its inputs keep the Title-case form.
+    """
+    if not catalogue["countries"]:
+        return region.strip().title(), country.strip().title()
+    
+    resolved_region = _resolve_region(region, catalogue)
+    if resolved_region is None:
+        raise UnknownNameError(f"Unknown region '{region}'", list(catalogue["by_region"]))
+    resolved_country = _resolve_country(country, catalogue)
+    if resolved_country is None:
+        raise UnknownNameError(f"Unknown country '{country}'", _suggest_countries(country, catalogue))
+    return resolved_region, resolved_country
+
+def _model_files() -> List[str]:
+    """Artifact files for the configured backend"""
+    if MODEL_BACKEND == "frequency":
+        return ["modelo_frecuencias.npz", "codificador_labels.pkl"]
+    if MODEL_BACKEND == "compiled":
+        return ["modelo_compilado.npz", "codificador_labels.pkl"]
+    return ["modelo_desastres.pkl", "codificador_labels.pkl"]
+
+def _files_signature(files: List[str]) -> tuple:
+    """(mtime, size) of every file, used to notice new artifacts"""
+    signature = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def _model_version(modelo, files: List[str]) -> str:
+    """Human readable version of the loaded artifacts"""
+    if isinstance(modelo, FrecuenciasNpz):
+        return f"frequency-v{modelo.version_}"
+    digest = hashlib.sha1()
+    with open(files[0], "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    prefix = "compiled" if isinstance(modelo, BosqueCompilado) else "forest"
+    return f"{prefix}-{digest.hexdigest()[:12]}"
+
+def _load_model() -> dict:
+    """Load the trained model files, precompute predictions and warm up"""
+    # Heavy imports happen here (not at module load) so the server starts fast
+    import joblib
+    
+    files = _model_files()
+    signature = _files_signature(files)
+    
+    codificador = joblib.load("codificador_labels.pkl")
+    if MODEL_BACKEND == "frequency":
+        modelo = FrecuenciasNpz.cargar("modelo_frecuencias.npz")
+        if list(modelo.clases_) != list(codificador.classes_):
+            raise ValueError("modelo_frecuencias.npz classes do not match codificador_labels.pkl")
+    elif MODEL_BACKEND == "compiled":
+        modelo = BosqueCompilado.cargar("modelo_compilado.npz")
+        if list(modelo.clases_) != list(codificador.classes_):
+            raise ValueError("modelo_compilado.npz classes do not match codificador_labels.pkl")
+    else:
         modelo = joblib.load("modelo_desastres.pkl")
-        codificador = joblib.load("codificador_labels.pkl")
-        
-        print("✅ Model loaded successfully!")
-        
-        # Prepare countries by continent
-        # This is extracted from your training data
-        countries_by_continent = {
-            "Asia": [
-                "Afghanistan", "Armenia", "Azerbaijan", "Bangladesh", "Bhutan",
-                "Brunei", "Cambodia", "China", "Georgia", "India", "Indonesia",
-                "Iran", "Iraq", "Israel", "Japan", "Jordan", "Kazakhstan",
-                "Korea", "Kuwait", "Kyrgyzstan", "Laos", "Lebanon", "Malaysia",
-                "Maldives", "Mongolia", "Myanmar", "Nepal", "Oman", "Pakistan",
-                "Palestine", "Philippines", "Qatar", "Russia", "Saudi Arabia",
-                "Singapore", "Sri Lanka", "Syria", "Taiwan", "Tajikistan",
-                "Thailand", "Turkey", "Turkmenistan", "United Arab Emirates",
-                "Uzbekistan", "Vietnam", "Yemen"
-            ],
-            "Europe": [
-                "Albania", "Andorra", "Austria", "Belarus", "Belgium",
-                "Bosnia And Herzegovina", "Bulgaria", "Croatia", "Cyprus",
-                "Czechia", "Denmark", "Estonia", "Finland", "France",
-                "Germany", "Greece", "Hungary", "Iceland", "Ireland",
-                "Italy", "Kosovo", "Latvia", "Liechtenstein", "Lithuania",
-                "Luxembourg", "Malta", "Moldova", "Monaco", "Montenegro",
-                "Netherlands", "North Macedonia", "Norway", "Poland",
-                "Portugal", "Romania", "Russia", "San Marino", "Serbia",
-                "Slovakia", "Slovenia", "Spain", "Sweden", "Switzerland",
-                "Ukraine", "United Kingdom", "Vatican"
-            ],
-            "Africa": [
-                "Algeria", "Angola", "Benin", "Botswana", "Burkina Faso",
-                "Burundi", "Cameroon", "Cape Verde", "Central African Republic",
-                "Chad", "Comoros", "Congo", "Djibouti", "Egypt",
-                "Equatorial Guinea", "Eritrea", "Eswatini", "Ethiopia",
-                "Gabon", "Gambia", "Ghana", "Guinea", "Guinea-Bissau",
-                "Ivory Coast", "Kenya", "Lesotho", "Liberia", "Libya",
-                "Madagascar", "Malawi", "Mali", "Mauritania", "Mauritius",
-                "Morocco", "Mozambique", "Namibia", "Niger", "Nigeria",
-                "Rwanda", "Sao Tome And Principe", "Senegal", "Seychelles",
-                "Sierra Leone", "Somalia", "South Africa", "South Sudan",
-                "Sudan", "Tanzania", "Togo", "Tunisia", "Uganda",
-                "Zambia", "Zimbabwe"
-            ],
-            "America": [
-                "Antigua And Barbuda", "Argentina", "Bahamas", "Barbados",
-                "Belize", "Bolivia", "Brazil", "Canada", "Chile", "Colombia",
-                "Costa Rica", "Cuba", "Dominica", "Dominican Republic",
-                "Ecuador", "El Salvador", "Grenada", "Guatemala", "Guyana",
-                "Haiti", "Honduras", "Jamaica", "Mexico", "Nicaragua",
-                "Panama", "Paraguay", "Peru", "Saint Kitts And Nevis",
-                "Saint Lucia", "Saint Vincent And The Grenadines",
-                "Suriname", "Trinidad And Tobago", "United States",
-                "Uruguay", "Venezuela"
-            ],
-            "Oceania": [
-                "Australia", "Fiji", "Kiribati", "Marshall Islands",
-                "Micronesia", "Nauru", "New Zealand", "Palau",
-                "Papua New Guinea", "Samoa", "Solomon Islands", "Tonga",
-                "Tuvalu", "Vanuatu"
-            ]
-        }
-        
-        print(f"✅ Loaded {sum(len(v) for v in countries_by_continent.values())} countries across {len(countries_by_continent)} continents")
-        
+    
+    matrix, index = _build_prediction_matrix(modelo)
+    
+    # Warm-up: one call through the model itself (the fallback path)
+    modelo.predict_proba(_model_input(modelo, {"Region": ["Asia"], "Country": ["Japan"]}))
+    
+    bundle = {
+        "modelo": modelo,
+        "codificador": codificador,
+        "matrix": matrix,
+        "index": index,
+        "version": _model_version(modelo, files),
+        "loaded_at": datetime.now().isoformat(),
+        "signature": signature,
+        "catalogue": _build_catalogue(modelo)
+    }
+    print(f"✅ Model loaded successfully! ({bundle['version']})")
+    return bundle
+
+# Optional preload before workers fork
+# With `PRELOAD_MODEL=1 gunicorn --preload -k uvicorn.workers.UvicornWorker`
+# the model is loaded once in the master process and every forked worker
+# shares its pages copy-on-write. gc.freeze() keeps the garbage collector
+# from writing to those objects (and un-sharing the pages) later on.
+if os.environ.get("PRELOAD_MODEL") == "1":
+    try:
+        _model_bundle = _load_model()
+        gc.freeze()
+    except Exception as e:
+        print(f"❌ Error preloading model: {e}")
+
+async def _load_model_at_startup():
+    """Load the model (unless preloaded before fork) and remember any error"""
+    global _model_load_error
+    try:
+        await _reload_model()
+        _model_load_error = None
+        print(f"✅ Ready to predict {time.time() - _process_started:.2f}s after start")
     except FileNotFoundError as e:
+        _model_load_error = str(e)
         print(f"❌ Error: Model files not found - {e}")
         print("Make sure 'modelo_desastres.pkl' and 'codificador_labels.pkl' are in the same directory")
     except Exception as e:
+        _model_load_error = str(e)
         print(f"❌ Error loading model: {e}")
 
+async def _await_model() -> dict:
+    """Current model bundle, waiting up to MODEL_LOAD_WAIT seconds if it is still loading"""
+    if _model_bundle is None and _model_loading is not None and not _model_loading.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(_model_loading), MODEL_LOAD_WAIT)
+        except asyncio.TimeoutError:
+            pass
+    
+    bundle = _model_bundle
+    if bundle is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Model not loaded. Please contact administrator."
+        )
+    return bundle
+
+# Load model and prepare data on startup
+async def load_model_and_data():
+    """Start loading the trained model (the country catalogue is built with it)"""
+    global _model_loading
+    
+    if _model_bundle is None:
+        _model_loading = asyncio.ensure_future(_load_model_at_startup())
+        if MODEL_LOAD_MODE == "blocking":
+            await _model_loading
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -130,52 +841,111 @@ async def root():
     return {
         "service": "iAlert AI Service",
         "status": "online",
-        "model_loaded": modelo is not None,
+        "model_loaded": _model_bundle is not None,
         "version": "1.0.0"
     }
 
 @app.get("/api/health")
 async def health_check():
-    """Detailed health check"""
+    """Liveness check: the process is up (the model may still be loading)"""
     return {
         "status": "healthy",
-        "model_status": "loaded" if modelo is not None else "not loaded",
-        "countries_loaded": len(countries_by_continent),
-        "total_countries": sum(len(v) for v in countries_by_continent.values())
+        "model_status": "loaded" if _model_bundle is not None else "not loaded",
+        "model_version": _model_bundle["version"] if _model_bundle is not None else None,
+        "countries_loaded": len(_model_bundle["catalogue"]["by_region"]) if _model_bundle is not None else 0,
+        "total_countries": len(_model_bundle["catalogue"]["country_regions"]) if _model_bundle is not None else 0
     }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness check: 200 once the model is loaded and warmed up, 503 before"""
+    bundle = _model_bundle
+    if bundle is not None:
+        return {
+            "status": "ready",
+            "model_version": bundle["version"],
+            "uptime_seconds": round(time.time() - _process_started, 3)
+        }
+    
+    loading = _model_loading is not None and not _model_loading.done()
+    return Response(
+        content=orjson.dumps({
+            "status": "loading" if loading else "failed",
+            "error": None if loading else _model_load_error,
+            "uptime_seconds": round(time.time() - _process_started, 3)
+        }),
+        media_type="application/json",
+        status_code=503
+    )
+
 # Get countries by continent
+@app.get("/api/countries/search")
+async def search_countries(
+    q: str = Query(..., min_length=1, description="Start of a country name, alias or any word in it"),
+    continent: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS)
+):
+    """
+    Typeahead over the countries the model knows
+    Matching ignores case, accents and punctuation, and also looks at
+    aliases ("usa", "ivory coast") and words inside names ("korea").
+    """
+    catalogue = (await _await_model())["catalogue"]
+    
+    region = None
+    if continent is not None:
+        region = _resolve_region(continent, catalogue)
+        if region is None:
+            raise HTTPException(status_code=404, detail=f"Continent '{continent}' not found")
+    
+    results = []
+    for country in catalogue["trie"].search(_normalize_name(q)):
+        regions = catalogue["country_regions"].get(country, [])
+        if region is not None and region not in regions:
+            continue
+        results.append({"country": country, "continents": regions})
+        if len(results) == limit:
+            break
+    
+    return {
+        "query": q,
+        "count": len(results),
+        "results": results
+    }
+
 @app.get("/api/countries/{continent}")
 async def get_countries(continent: str):
     """
     Get list of countries for a given continent
     
     Args:
-        continent: One of Asia, Europe, Africa, America, Oceania
+        continent: One of Africa, Americas, Asia, Europe, Oceania (any case;
+            aliases such as "America" are accepted)
     
     Returns:
         Dictionary with continent name (string) and list of countries
     """
-    # Normalize continent name (capitalize first letter)
-    continent = continent.capitalize()
+    catalogue = (await _await_model())["catalogue"]
+    region = _resolve_region(continent, catalogue)
     
-    if continent not in countries_by_continent:
+    if region is None:
         raise HTTPException(
             status_code=404,
-            detail=f"Continent '{continent}' not found. Available: {list(countries_by_continent.keys())}"
+            detail=f"Continent '{continent}' not found. Available: {list(catalogue['by_region'].keys())}"
         )
     
     return {
-        "continent": continent,
-        "countries": countries_by_continent[continent]
+        "continent": region,
+        "countries": catalogue["by_region"][region]
     }
 
 # Get all continents
 @app.get("/api/continents")
 async def get_continents() -> Dict[str, List[str]]:
     """Get list of all available continents"""
+    catalogue = (await _await_model())["catalogue"]
     return {
-        "continents": list(countries_by_continent.keys())
+        "continents": list(catalogue["by_region"].keys())
     }
 
 # Predict disaster
@@ -190,35 +960,22 @@ async def predict_disaster(request: PredictionRequest):
     Returns:
         Prediction probabilities for different disaster types
     """
-    if modelo is None or codificador is None:
+    bundle = await _await_model()
+    
+    # Map inputs to the names the model was trained on (aliases, accents,
+    # case); names it does not know are rejected with suggestions
+    try:
+        region, country = _resolve_pair(request.region, request.country, bundle["catalogue"])
+    except UnknownNameError as e:
         raise HTTPException(
-            status_code=503,
-            detail="Model not loaded. Please contact administrator."
+            status_code=422,
+            detail={"error": str(e), "suggestions": e.suggestions}
         )
     
     try:
-        # Normalize inputs (Title case to match training data)
-        region = request.region.title()
-        country = request.country.title()
-        
-        # Create input dataframe (must match training data structure)
-        df = pd.DataFrame({
-            "Region": [region],
-            "Country": [country]
-        })
-        
-        # Get probabilities from model
-        probabilities = modelo.predict_proba(df)[0]
-        labels = codificador.classes_
-        
-        # Create predictions dictionary
-        predictions = {
-            labels[i]: float(probabilities[i])
-            for i in range(len(labels))
-        }
-        
-        # Sort by probability (highest first)
-        predictions = dict(sorted(predictions.items(), key=lambda x: x[1], reverse=True))
+        # Get probabilities (precomputed matrix, model as fallback)
+        probabilities = _predict_probabilities(region, country, bundle)
+        predictions = _format_predictions(probabilities, bundle)
         
         return PredictionResponse(
             status="ok",
@@ -233,161 +990,1128 @@ async def predict_disaster(request: PredictionRequest):
             detail=f"Prediction error: {str(e)}"
         )
 
+# Predict disasters for many region/country pairs at once
+@app.post("/api/predict-disaster/batch", response_model=BatchPredictionResponse)
+async def predict_disaster_batch(request: BatchPredictionRequest):
+    """
+    Predict disaster probabilities for a list of region/country pairs
+    
+    All valid items are scored together (one vectorized lookup plus at most
+    one model call for unknown pairs). Results keep the input order and
+    invalid items get their own error instead of failing the whole batch.
+    
+    Args:
+        request: BatchPredictionRequest with a list of region/country items
+    
+    Returns:
+        One result per input item
+    """
+    bundle = await _await_model()
+    
+    if len(request.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large ({len(request.items)} items). Maximum is {MAX_BATCH_SIZE}."
+        )
+    
+    results = []
+    valid = []   # (position in results, (region, country))
+    
+    catalogue = bundle["catalogue"]
+    for item in request.items:
+        if not item.region.strip() or not item.country.strip():
+            results.append(BatchPredictionItem(
+                status="error",
+                region=item.region,
+                country=item.country,
+                error="Region and country are required"
+            ))
+            continue
+        
+        # Map inputs to the names the model was trained on
+        try:
+            region, country = _resolve_pair(item.region, item.country, catalogue)
+        except UnknownNameError as e:
+            results.append(BatchPredictionItem(
+                status="error",
+                region=item.region,
+                country=item.country,
+                error=str(e),
+                suggestions=e.suggestions
+            ))
+            continue
+        
+        valid.append((len(results), (region, country)))
+        results.append(None)
+    
+    if valid:
+        try:
+            probabilities = _predict_batch([pair for _, pair in valid], bundle)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Prediction error: {str(e)}"
+            )
+        
+        for row, (position, (region, country)) in enumerate(valid):
+            results[position] = BatchPredictionItem(
+                status="ok",
+                region=region,
+                country=country,
+                predictions=_format_predictions(probabilities[row], bundle)
+            )
+    
+    return BatchPredictionResponse(
+        status="ok",
+        count=len(results),
+        results=results
+    )
+
 # Get model info
 @app.get("/api/model-info")
 async def get_model_info():
     """Get information about the loaded model"""
-    if modelo is None or codificador is None:
+    bundle = _model_bundle
+    if bundle is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     return {
-        "model_type": str(type(modelo)),
-        "disaster_types": list(codificador.classes_),
-        "num_disaster_types": len(codificador.classes_),
+        "model_type": str(type(bundle["modelo"])),
+        "backend": MODEL_BACKEND,
+        "version": bundle["version"],
+        "loaded_at": bundle["loaded_at"],
+        "disaster_types": list(bundle["codificador"].classes_),
+        "num_disaster_types": len(bundle["codificador"].classes_),
         "features": ["Region", "Country"]
     }
 
-# Cache for EONET data (in-memory)
+# Hot model reload
+_reload_lock = asyncio.Lock()
+_model_watcher: Optional[asyncio.Task] = None
+
+async def _reload_model() -> dict:
+    """
+    Load the current artifacts in a worker thread and swap them in
+    Requests already running keep the bundle they started with; new
+    requests see the new one as soon as the assignment happens.
+    """
+    global _model_bundle
+    async with _reload_lock:
+        bundle = await asyncio.to_thread(_load_model)
+        _model_bundle = bundle
+        return bundle
+
+async def _watch_model_files():
+    """Reload the model whenever its files change on disk"""
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        if _model_loading is not None and not _model_loading.done():
+            continue  # startup load still running
+        if _reload_lock.locked():
+            continue  # a reload (e.g. the admin endpoint) is already running
+        current = _model_bundle
+        signature = _files_signature(_model_files())
+        if current is not None and signature == current["signature"]:
+            continue
+        if None in signature:
+            continue  # a file is missing (mid-copy?), try again next time
+        
+        try:
+            bundle = await _reload_model()
+            print(f"🔄 Model files changed, now serving {bundle['version']}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Model reload failed, keeping the previous version: {e}")
+
+async def start_model_watcher():
+    """Start the model file watcher (MODEL_WATCH_INTERVAL > 0)"""
+    global _model_watcher
+    if MODEL_WATCH_INTERVAL > 0:
+        _model_watcher = asyncio.ensure_future(_watch_model_files())
+
+async def stop_model_watcher():
+    """Stop the model file watcher"""
+    if _model_watcher is not None:
+        _model_watcher.cancel()
+
+def _touch_model_files():
+    """Bump the model files' mtime so the watchers of other workers reload too"""
+    for path in _model_files():
+        try:
+            os.utime(path)
+        except OSError as e:
+            print(f"⚠️ Could not touch {path}, other workers will not reload: {e}")
+
+@app.post("/api/admin/reload-model")
+async def reload_model(request: Request):
+    """
+    Load the model files again and swap them in without downtime
+    Requires ADMIN_TOKEN to be set and sent in the X-Admin-Token header.
+    
+    Only the worker that receives the request reloads here. It touches the
+    model files first, so with several workers every other worker follows
+    within MODEL_WATCH_INTERVAL, which must then be set.
+    """
+    if not ADMIN_TOKEN or not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    
+    previous = _model_bundle["version"] if _model_bundle is not None else None
+    _touch_model_files()
+    try:
+        bundle = await _reload_model()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Reload failed, still serving {previous}: {str(e)}"
+        )
+    
+    return {
+        "status": "ok",
+        "previous_version": previous,
+        "version": bundle["version"],
+        "loaded_at": bundle["loaded_at"]
+    }
+
+# Cache for EONET data (in-memory LRU keyed by normalized limit)
+# An entry fetched with a larger limit also answers smaller queries by slicing.
+# Entries are built from the event store, which always holds every open
+# event, so `days` is not part of the key.
 _disasters_cache = {
-    "data": None,
-    "timestamp": None,
-    "ttl": 300  # 5 minutes cache
+    "entries": OrderedDict(),  # (limit,) -> {"data": dict, "timestamp": datetime}
+    "max_entries": 16,
+    "ttl": 300,                # 5 minutes cache
+    "refresh_interval": 240,   # background refresh before the TTL runs out
+    "hits": 0,
+    "stale_hits": 0,
+    "misses": 0
+}
+
+# Largest limit forwarded upstream
+MAX_DISASTERS_LIMIT = 1000
+
+# Pre-serialized responses
+GZIP_MIN_SIZE = 1024           # smaller bodies are sent uncompressed
+MAX_SERIALIZED_VARIANTS = 8    # encoded limit/view variants kept per cache entry
+
+# Fields a client can select with /api/disasters?fields=
+EVENT_FIELDS = ("id", "title", "description", "category", "lat", "lng", "date", "link")
+
+# Local EONET event store, keyed by event id
+# Filled by one full download, then kept current with date-window queries
+# that only return events with new activity since the last sync.
+_event_store = {
+    "events": {},                  # event id -> raw EONET event with merged geometry
+    "open_events": [],             # processed open events, newest first
+    "api_version": None,
+    "last_sync": None,
+    "last_full_sync": None,
+    "full_resync_interval": 3600,  # full download every hour to catch drift
+    "min_sync_interval": 5,        # coalesce syncs requested back to back
+    "closed_retention_days": 7,    # how long closed events are kept
+    "lock": asyncio.Lock()
+}
+
+# Spatial index over the open events, rebuilt after every sync
+# Points are sorted by latitude so a radius query only scans one band.
+EARTH_RADIUS_KM = 6371.0
+_spatial_index = {
+    "lat": np.empty(0),
+    "lat_rad": np.empty(0),
+    "lng_rad": np.empty(0),
+    "category": np.empty(0, dtype=object),
+    "events": []
 }
 
+# Cluster hierarchy over the open events for the globe, rebuilt after every sync
+# Zoom z groups events on a lat/lng grid of CLUSTER_CELL_DEGREES / 2**z degree
+# cells, so a query is a lookup of one precomputed level.
+CLUSTER_CELL_DEGREES = 22.5     # divides 180 and 360, so every zoom is an even grid
+MAX_CLUSTER_ZOOM = 10
+_cluster_index = {
+    "levels": [],        # zoom -> list of clusters
+    "serialized": {}     # zoom -> pre-encoded whole-globe response
+}
+
+# Live event stream subscribers (Server-Sent Events)
+# Each sync's changes are serialized once and fanned out to every queue.
+SUBSCRIBER_QUEUE_SIZE = 32     # pending messages before a client must resync
+STREAM_HEARTBEAT = 15          # seconds between keep-alive comments
+_subscribers: Dict[int, dict] = {}   # id(subscriber) -> subscriber
+
+# Parameters used by the background refresher
+DEFAULT_DISASTERS_DAYS = 30
+BACKGROUND_REFRESH = os.environ.get("DISASTERS_BACKGROUND_REFRESH", "1") != "0"
+REFRESH_RETRY_DELAY = 30  # seconds to wait after a failed background refresh
+
+# Single-flight refresh: every caller joins the in-flight fetch for its key
+_refresh_tasks: Dict[tuple, asyncio.Task] = {}
+_background_refresher: Optional[asyncio.Task] = None
+
+# Upstream EONET configuration
+# EONET_BASE_URL can point at a local stub (see eonet_stub.py) for testing
+EONET_BASE_URL = os.environ.get("EONET_BASE_URL", "https://eonet.gsfc.nasa.gov/api").rstrip("/")
+EONET_USE_PROXIES = os.environ.get("EONET_USE_PROXIES", "1") != "0"
+UPSTREAM_DEADLINE = float(os.environ.get("EONET_DEADLINE", "10"))      # seconds for the whole fetch
+UPSTREAM_HEDGE_DELAY = float(os.environ.get("EONET_HEDGE_DELAY", "1.5"))  # seconds before trying the next endpoint
+
+# Shared HTTP client (connection pooling / keep-alive across requests)
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(UPSTREAM_DEADLINE),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={
+                "User-Agent": "iAlert-DisasterMonitoring/1.0",
+                "Accept": "application/json"
+            },
+            follow_redirects=True
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close pooled upstream connections"""
+    if _http_client is not None:
+        await _http_client.aclose()
+
+def _eonet_endpoints(limit: int, days: int) -> List[str]:
+    """Endpoints to try, in order of preference - v3 first (better data)"""
+    v3 = f"{EONET_BASE_URL}/v3/events?status=open&limit={limit}"
+    v21 = f"{EONET_BASE_URL}/v2.1/events?status=open&limit={limit}&days={days}"
+    
+    endpoints = [v3, v21]
+    if EONET_USE_PROXIES:
+        endpoints += [
+            # v3 via CORS proxy
+            f"https://api.allorigins.win/raw?url={v3}",
+            # v2.1 via CORS proxy
+            f"https://api.allorigins.win/raw?url={v21}",
+            # Another CORS proxy with v3
+            f"https://corsproxy.io/?{v3}"
+        ]
+    return endpoints
+
+def _window_endpoints(start: str, end: str) -> List[str]:
+    """v3 endpoints for events (open or closed) with activity between two dates"""
+    v3 = f"{EONET_BASE_URL}/v3/events?status=all&start={start}&end={end}"
+    
+    endpoints = [v3]
+    if EONET_USE_PROXIES:
+        endpoints += [
+            f"https://api.allorigins.win/raw?url={v3}",
+            f"https://corsproxy.io/?{v3}"
+        ]
+    return endpoints
+
+def _process_events(events: list) -> List[dict]:
+    """Flatten raw EONET events (v2.1 or v3) into the format the app uses"""
+    processed_events = []
+    for evt in events:
+        # v3 uses "geometry", v2.1 uses "geometries"
+        geometries = evt.get("geometry") or evt.get("geometries")
+        
+        if not geometries or len(geometries) == 0:
+            continue
+        
+        # Get latest geometry
+        geom = geometries[-1] if isinstance(geometries, list) else geometries
+        
+        # v3: coordinates array, v2.1: coordinates in different format
+        coords = geom.get("coordinates", [])
+        
+        if len(coords) < 2:
+            continue
+        
+        # Extract category
+        categories = evt.get("categories", [])
+        category = "unknown"
+        if categories and len(categories) > 0:
+            # v3: categories[0]["id"], v2.1: categories[0]["id"] (same)
+            cat_obj = categories[0]
+            category = cat_obj.get("id") if isinstance(cat_obj, dict) else str(cat_obj)
+        
+        # Extract source link
+        sources = evt.get("sources", [])
+        link = None
+        if sources and len(sources) > 0:
+            source_obj = sources[0]
+            link = source_obj.get("url") if isinstance(source_obj, dict) else None
+        
+        processed_events.append({
+            "id": evt.get("id"),
+            "title": evt.get("title"),
+            "description": evt.get("description", ""),
+            "category": category,
+            "lat": coords[1],
+            "lng": coords[0],
+            "date": geom.get("date"),
+            "link": link or evt.get("link")
+        })
+    return processed_events
+
+def _upstream_label(url: str) -> str:
+    """Metric label for an upstream URL: host + EONET API version"""
+    return f"{urlsplit(url).netloc}/{'v2.1' if 'v2.1' in url else 'v3'}"
+
+async def _fetch_endpoint(url: str) -> dict:
+    """Fetch one EONET endpoint, raising on any invalid response"""
+    print(f"📡 Trying: {url[:80]}...")
+    
+    endpoint = _upstream_label(url)
+    start = time.perf_counter()
+    try:
+        response = await _get_http_client().get(url)
+        response.raise_for_status()
+        _observe("ialert_upstream_request_duration_seconds", time.perf_counter() - start, endpoint=endpoint)
+        
+        with _timed("upstream_parse"):
+            data = response.json()
+            
+            # Handle wrapped responses from proxies
+            if "contents" in data:
+                data = json.loads(data["contents"])
+        
+        events = data.get("events")
+        if not isinstance(events, list):
+            raise ValueError("Response has no 'events' list")
+    except asyncio.CancelledError:
+        _count("ialert_upstream_requests_total", endpoint=endpoint, outcome="cancelled")
+        raise
+    except Exception:
+        _count("ialert_upstream_requests_total", endpoint=endpoint, outcome="failure")
+        raise
+    _count("ialert_upstream_requests_total", endpoint=endpoint, outcome="success")
+    
+    print(f"✅ Got {len(events)} events from {url[:40]}...")
+    
+    return {
+        "events": events,
+        "api_version": "v2.1" if "v2.1" in url else "v3"
+    }
+
+async def _fetch_first(urls: List[str]) -> dict:
+    """
+    Hedged fetch across endpoints
+    The first endpoint starts immediately; the next one starts when the
+    previous fails or UPSTREAM_HEDGE_DELAY passes without an answer. The
+    first valid response wins and the remaining requests are cancelled.
+    Everything is bounded by UPSTREAM_DEADLINE.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + UPSTREAM_DEADLINE
+    remaining_urls = list(urls)
+    pending = {}   # task -> url
+    last_error = "no endpoints configured"
+    
+    try:
+        while True:
+            if remaining_urls:
+                url = remaining_urls.pop(0)
+                pending[asyncio.ensure_future(_fetch_endpoint(url))] = url
+            
+            time_left = deadline - loop.time()
+            if not pending or time_left <= 0:
+                break
+            
+            wait_for = min(UPSTREAM_HEDGE_DELAY, time_left) if remaining_urls else time_left
+            done, _ = await asyncio.wait(
+                pending.keys(),
+                timeout=wait_for,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            
+            for task in done:
+                url = pending.pop(task)
+                error = task.exception()
+                if error is None:
+                    return task.result()
+                last_error = f"{type(error).__name__}: {error}"
+                print(f"❌ Failed {url[:60]}: {last_error}")
+        
+        if pending:
+            last_error = f"deadline of {UPSTREAM_DEADLINE:.0f}s exceeded"
+        raise RuntimeError(last_error)
+    finally:
+        for task in pending:
+            task.cancel()
+
+def _geometry_key(geom: dict) -> tuple:
+    """Identity of one geometry point, used to deduplicate merges"""
+    return (geom.get("date") or "", json.dumps(geom.get("coordinates"), sort_keys=True))
+
+def _merge_event(evt: dict, now: datetime):
+    """Insert or update one raw EONET event in the local store"""
+    event_id = evt.get("id")
+    if not event_id:
+        return
+    
+    geometries = evt.get("geometry") or evt.get("geometries") or []
+    if isinstance(geometries, dict):
+        geometries = [geometries]
+    
+    events = _event_store["events"]
+    stored = events.get(event_id)
+    if stored is None:
+        stored = {"geometry": []}
+        events[event_id] = stored
+    
+    # Take the latest metadata (title, categories, sources, closed, ...)
+    stored.update({k: v for k, v in evt.items() if k not in ("geometry", "geometries")})
+    
+    # Merge new geometry points, oldest first so [-1] stays the latest
+    known = {_geometry_key(g) for g in stored["geometry"]}
+    for geom in geometries:
+        if _geometry_key(geom) not in known:
+            stored["geometry"].append(geom)
+    stored["geometry"].sort(key=lambda g: g.get("date") or "")
+    
+    if stored.get("closed"):
+        stored.setdefault("_closed_at", now)
+    else:
+        stored.pop("_closed_at", None)
+
+def _mark_closed(event_id: str, now: datetime):
+    """Flag a stored event as closed"""
+    stored = _event_store["events"][event_id]
+    if not stored.get("closed"):
+        stored["closed"] = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+    stored.setdefault("_closed_at", now)
+
+def _rebuild_open_events():
+    """Recompute the processed list of open events, newest first"""
+    store = _event_store
+    cutoff = datetime.now() - timedelta(days=store["closed_retention_days"])
+    
+    # Forget events that have been closed for a while
+    for event_id in [i for i, e in store["events"].items() if e.get("_closed_at") and e["_closed_at"] < cutoff]:
+        del store["events"][event_id]
+    
+    with _timed("process_events"):
+        open_events = [e for e in store["events"].values() if not e.get("closed")]
+        processed = _process_events(open_events)
+        processed.sort(key=_event_sort_key, reverse=True)
+    
+    previous = store["open_events"]
+    store["open_events"] = processed
+    with _timed("spatial_index"):
+        _build_spatial_index(processed)
+    with _timed("cluster_index"):
+        _build_cluster_index(processed)
+    with _timed("publish_changes"):
+        _publish_changes(previous, processed)
+
+def _event_sort_key(evt: dict) -> tuple:
+    """Order of open events (newest first when reversed); the id breaks ties for cursors"""
+    return (evt.get("date") or "", evt.get("id") or "")
+
+def _build_spatial_index(events: List[dict]):
+    """Index open events by latitude for radius queries"""
+    points = []
+    for i, evt in enumerate(events):
+        try:
+            points.append((float(evt["lat"]), float(evt["lng"]), i))
+        except (TypeError, ValueError):
+            continue  # polygon geometries have no single point
+    points.sort()
+    
+    lat = np.array([p[0] for p in points], dtype=np.float64)
+    lng = np.array([p[1] for p in points], dtype=np.float64)
+    _spatial_index["lat"] = lat
+    _spatial_index["lat_rad"] = np.radians(lat)
+    _spatial_index["lng_rad"] = np.radians(lng)
+    _spatial_index["category"] = np.array([events[p[2]]["category"] for p in points], dtype=object)
+    _spatial_index["events"] = [events[p[2]] for p in points]
+
+def _build_cluster_index(events: List[dict]):
+    """
+    Group open events into grid clusters for every zoom level
+    Each cluster has its mean position, event count, per-category counts
+    and the zoom at which it first splits (None if it never does).
+    Single-event clusters carry the event id.
+    """
+    points = []
+    for evt in events:
+        try:
+            points.append((float(evt["lat"]), float(evt["lng"]), evt))
+        except (TypeError, ValueError):
+            continue  # polygon geometries have no single point
+    
+    _cluster_index["serialized"] = {}
+    if not points:
+        _cluster_index["levels"] = [[] for _ in range(MAX_CLUSTER_ZOOM + 1)]
+        return
+    
+    lat = np.array([p[0] for p in points], dtype=np.float64)
+    lng = np.array([p[1] for p in points], dtype=np.float64)
+    category_names, category_codes = np.unique(
+        np.array([p[2]["category"] for p in points], dtype=object).astype(str), return_inverse=True
+    )
+    category_names = category_names.tolist()
+    
+    # Cells of the finest zoom; coarser zooms merge 2x2 cells by shifting
+    size = CLUSTER_CELL_DEGREES / 2 ** MAX_CLUSTER_ZOOM
+    rows = int(round(180 / size))
+    cols = int(round(360 / size))
+    row = np.minimum(np.floor((lat + 90) / size).astype(np.int64), rows - 1)
+    col = np.floor((lng + 180) / size).astype(np.int64) % cols
+    
+    levels = [None] * (MAX_CLUSTER_ZOOM + 1)
+    child_of = None        # finer-level cluster -> cluster at this level
+    finer_expansion = None
+    for zoom in range(MAX_CLUSTER_ZOOM, -1, -1):
+        shift = MAX_CLUSTER_ZOOM - zoom
+        cell_row, cell_col = row >> shift, col >> shift
+        cells, members = np.unique((cell_row << 32) | cell_col, return_inverse=True)
+        n = len(cells)
+        
+        counts = np.bincount(members, minlength=n)
+        mean_lat = np.bincount(members, weights=lat, minlength=n) / counts
+        mean_lng = np.bincount(members, weights=lng, minlength=n) / counts
+        by_category = np.bincount(
+            members * len(category_names) + category_codes, minlength=n * len(category_names)
+        ).reshape(n, len(category_names))
+        first_member = np.full(n, len(points), dtype=np.int64)
+        np.minimum.at(first_member, members, np.arange(len(points)))
+        
+        # A cluster expands at the next zoom if it has several children there,
+        # otherwise wherever its only child expands
+        expansion = [None] * n
+        if child_of is not None:
+            children = np.bincount(child_of, minlength=n)
+            for child, parent in enumerate(child_of.tolist()):
+                expansion[parent] = zoom + 1 if children[parent] > 1 else finer_expansion[child]
+        
+        clusters = []
+        for k in range(n):
+            cluster = {
+                "id": f"{zoom}/{int(cells[k] >> 32)}/{int(cells[k] & 0xFFFFFFFF)}",
+                "lat": round(float(mean_lat[k]), 5),
+                "lng": round(float(mean_lng[k]), 5),
+                "count": int(counts[k]),
+                "categories": {
+                    category_names[c]: int(by_category[k, c]) for c in np.nonzero(by_category[k])[0]
+                },
+                "expansion_zoom": expansion[k]
+            }
+            if counts[k] == 1:
+                cluster["event_id"] = points[first_member[k]][2].get("id")
+            clusters.append(cluster)
+        levels[zoom] = clusters
+        
+        # Map this level's clusters onto the next coarser level
+        child_of = np.unique(
+            ((cells >> 32) >> 1 << 32) | ((cells & 0xFFFFFFFF) >> 1), return_inverse=True
+        )[1] if zoom > 0 else None
+        finer_expansion = expansion
+    
+    _cluster_index["levels"] = levels
+
+def _parse_bbox(bbox: Optional[str]) -> Optional[tuple]:
+    """
+    Parse "min_lng,min_lat,max_lng,max_lat" (GeoJSON order)
+    min_lng > max_lng describes a box that crosses the antimeridian
+    """
+    if not bbox:
+        return None
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="bbox must be 'min_lng,min_lat,max_lng,max_lat'"
+        )
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox min_lat is greater than max_lat")
+    return min_lng, min_lat, max_lng, max_lat
+
+def _parse_categories(category: Optional[str]) -> Optional[set]:
+    """Parse a comma-separated list of EONET category ids"""
+    if not category:
+        return None
+    return {c.strip() for c in category.split(",") if c.strip()} or None
+
+def _event_matches(evt: dict, categories: Optional[set], bbox: Optional[tuple]) -> bool:
+    """True if an event passes the category and bounding-box filters"""
+    if categories is not None and evt.get("category") not in categories:
+        return False
+    if bbox is None:
+        return True
+    
+    try:
+        lat, lng = float(evt["lat"]), float(evt["lng"])
+    except (TypeError, ValueError):
+        return False
+    min_lng, min_lat, max_lng, max_lat = bbox
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lng <= max_lng:
+        return min_lng <= lng <= max_lng
+    return lng >= min_lng or lng <= max_lng
+
+def _parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Parse a comma-separated list of event fields to return"""
+    if not fields:
+        return None
+    wanted = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in wanted if f not in EVENT_FIELDS]
+    if unknown or not wanted:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}. Available: {list(EVENT_FIELDS)}"
+        )
+    return wanted
+
+def _encode_cursor(evt: dict) -> str:
+    """Opaque cursor pointing just after `evt` in the newest-first order"""
+    return base64.urlsafe_b64encode(orjson.dumps(list(_event_sort_key(evt)))).decode().rstrip("=")
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    if not cursor:
+        return None
+    try:
+        date, event_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (str(date), str(event_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _page_start(events: List[dict], after: tuple) -> int:
+    """Index of the first event that sorts after the cursor (events are newest first)"""
+    lo, hi = 0, len(events)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _event_sort_key(events[mid]) < after:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+def _parse_view(
+    fields: Optional[str],
+    bbox: Optional[str],
+    category: Optional[str],
+    cursor: Optional[str],
+    page_size: Optional[int]
+) -> Optional[tuple]:
+    """
+    Hashable (fields, bbox, categories, cursor, page_size) view of a cached
+    event list, or None for the full list
+    """
+    categories = _parse_categories(category)
+    view = (
+        _parse_fields(fields),
+        _parse_bbox(bbox),
+        frozenset(categories) if categories else None,
+        _decode_cursor(cursor),
+        page_size
+    )
+    return view if any(v is not None for v in view) else None
+
+def _sse_message(event: str, items: Dict[str, List[str]]) -> str:
+    """Format one SSE message from lists of pre-serialized JSON values"""
+    body = ",".join(f'"{key}":[{",".join(values)}]' for key, values in items.items())
+    return f"event: {event}\ndata: {{{body}}}\n\n"
+
+def _publish_changes(previous: List[dict], current: List[dict]):
+    """Push added, updated and closed events to every stream subscriber"""
+    if not _subscribers:
+        return
+    
+    before = {e["id"]: e for e in previous}
+    after = {e["id"]: e for e in current}
+    added = [e for i, e in after.items() if i not in before]
+    updated = [e for i, e in after.items() if i in before and before[i] != e]
+    closed = [e for i, e in before.items() if i not in after]
+    if not (added or updated or closed):
+        return
+    
+    # Serialize each event once, whatever the number of subscribers
+    added = [(e, orjson.dumps(e).decode()) for e in added]
+    updated = [(e, orjson.dumps(e).decode()) for e in updated]
+    closed = [(e, orjson.dumps(e["id"]).decode()) for e in closed]
+    
+    for subscriber in list(_subscribers.values()):
+        items = {
+            name: [raw for e, raw in group if _event_matches(e, subscriber["categories"], subscriber["bbox"])]
+            for name, group in (("added", added), ("updated", updated), ("closed", closed))
+        }
+        if not any(items.values()):
+            continue
+        
+        queue = subscriber["queue"]
+        try:
+            queue.put_nowait(_sse_message("changes", items))
+        except asyncio.QueueFull:
+            # Slow client: drop its backlog and ask it to reload the full list
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait("event: resync\ndata: {}\n\n")
+
+def _haversine_km(lat1, lng1, lat2_rad, lng2_rad) -> np.ndarray:
+    """Great-circle distance from one point (degrees) to arrays of points (radians)"""
+    lat1_rad, lng1_rad = math.radians(lat1), math.radians(lng1)
+    a = (
+        np.sin((lat2_rad - lat1_rad) / 2) ** 2
+        + math.cos(lat1_rad) * np.cos(lat2_rad) * np.sin((lng2_rad - lng1_rad) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def _events_near(lat: float, lng: float, radius_km: float, category: Optional[str] = None) -> List[tuple]:
+    """
+    (distance_km, event) pairs within radius_km of a point, nearest first
+    Only the latitude band that can contain matches is scanned; distances
+    inside the band are computed in one vectorized pass.
+    """
+    index = _spatial_index
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lo = np.searchsorted(index["lat"], lat - dlat, side="left")
+    hi = np.searchsorted(index["lat"], lat + dlat, side="right")
+    if lo >= hi:
+        return []
+    
+    distances = _haversine_km(lat, lng, index["lat_rad"][lo:hi], index["lng_rad"][lo:hi])
+    mask = distances <= radius_km
+    if category:
+        mask &= index["category"][lo:hi] == category
+    
+    hits = np.nonzero(mask)[0]
+    hits = hits[np.argsort(distances[hits])]
+    return [(float(distances[i]), index["events"][lo + i]) for i in hits]
+
+async def _full_sync():
+    """Replace the open event set with a full download"""
+    now = datetime.now()
+    data = await _fetch_first(_eonet_endpoints(MAX_DISASTERS_LIMIT, DEFAULT_DISASTERS_DAYS))
+    
+    seen = set()
+    for evt in data["events"]:
+        _merge_event(evt, now)
+        if evt.get("id"):
+            seen.add(evt["id"])
+    
+    # Anything we had that is no longer in the open list has been closed
+    # (only v3 returns every open event; the v2.1 fallback is day-limited)
+    if data["api_version"] == "v3":
+        for event_id in list(_event_store["events"]):
+            if event_id not in seen:
+                _mark_closed(event_id, now)
+    
+    _event_store["api_version"] = data["api_version"]
+    _event_store["last_full_sync"] = now
+    _event_store["last_sync"] = now
+    print(f"🔄 Full sync: {len(seen)} open events")
+
+async def _incremental_sync():
+    """Fetch only events with activity since the last sync and merge them"""
+    now = datetime.now()
+    # One day of overlap covers clock skew and EONET's day-granular filters
+    start = (_event_store["last_sync"] - timedelta(days=1)).strftime("%Y-%m-%d")
+    end = now.strftime("%Y-%m-%d")
+    data = await _fetch_first(_window_endpoints(start, end))
+    
+    for evt in data["events"]:
+        _merge_event(evt, now)
+    
+    _event_store["last_sync"] = now
+    print(f"🔄 Incremental sync {start}..{end}: {len(data['events'])} changed events")
+
+async def _sync_event_store():
+    """Bring the local event store up to date (incrementally when possible)"""
+    async with _event_store["lock"]:
+        store = _event_store
+        now = datetime.now()
+        
+        # Another caller just synced while we waited for the lock
+        if store["last_sync"] is not None and (now - store["last_sync"]).total_seconds() < store["min_sync_interval"]:
+            return
+        
+        needs_full = (
+            store["last_full_sync"] is None
+            or (now - store["last_full_sync"]).total_seconds() >= store["full_resync_interval"]
+        )
+        if needs_full:
+            with _timed("sync_full"):
+                await _full_sync()
+        else:
+            try:
+                with _timed("sync_incremental"):
+                    await _incremental_sync()
+            except Exception as e:
+                print(f"⚠️ Incremental sync failed ({e}), falling back to a full sync")
+                with _timed("sync_full"):
+                    await _full_sync()
+        
+        _rebuild_open_events()
+
+def _store_result(limit: int) -> dict:
+    """Build a /api/disasters payload from the local event store"""
+    events = _event_store["open_events"][:limit]
+    return {
+        "status": "ok",
+        "count": len(events),
+        "events": events,
+        "source": "eonet",
+        "api_version": _event_store["api_version"],
+        "synced_at": _event_store["last_sync"].isoformat(),
+        "cached": False
+    }
+
+def _cache_key(limit: int) -> tuple:
+    """Normalize query parameters into a cache key"""
+    return (max(1, min(limit, MAX_DISASTERS_LIMIT)),)
+
+# Every payload is a slice of the event store, so all limits and views are
+# answered from this one entry, which the background refresher keeps warm
+FULL_SET_KEY = _cache_key(MAX_DISASTERS_LIMIT)
+
+def _covers(key: tuple, wanted: tuple) -> bool:
+    """True if a result fetched for `key` can answer the query `wanted`"""
+    return key[0] >= wanted[0]
+
+def _cache_lookup(key: tuple) -> Optional[dict]:
+    """Freshest cache entry that covers `key` (marked as recently used)"""
+    entries = _disasters_cache["entries"]
+    candidates = [k for k in entries if _covers(k, key)]
+    if not candidates:
+        return None
+    
+    best = max(candidates, key=lambda k: entries[k]["timestamp"])
+    entries.move_to_end(best)
+    return entries[best]
+
+def _cache_store(key: tuple, data: dict):
+    """Insert an entry, dropping entries it makes redundant and the least recently used"""
+    entries = _disasters_cache["entries"]
+    for k in [k for k in entries if k != key and _covers(key, k)]:
+        del entries[k]
+    
+    entries[key] = {"data": data, "timestamp": datetime.now()}
+    entries.move_to_end(key)
+    while len(entries) > _disasters_cache["max_entries"]:
+        entries.popitem(last=False)
+
+def _entry_age(entry: dict) -> float:
+    """Seconds since a cache entry was stored"""
+    return (datetime.now() - entry["timestamp"]).total_seconds()
+
+def _shape_result(data: dict, limit: int, cached: bool, view: Optional[tuple] = None) -> dict:
+    """
+    Copy a cached payload, sliced down to `limit` events
+    A view (see _parse_view) instead filters the whole cached list by
+    category and bbox and pages from the cursor, with `limit` (or a smaller
+    page_size) capping the page, then keeps only the requested fields.
+    """
+    result = data.copy()
+    
+    if view is None:
+        if len(result["events"]) > limit:
+            result["events"] = result["events"][:limit]
+            result["count"] = limit
+    else:
+        fields, bbox, categories, after, page_size = view
+        events = result["events"]
+        if bbox is not None or categories is not None:
+            events = [e for e in events if _event_matches(e, categories, bbox)]
+        if after is not None:
+            events = events[_page_start(events, after):]
+        size = min(page_size, limit) if page_size is not None else limit
+        next_cursor = None
+        if len(events) > size:
+            events = events[:size]
+            next_cursor = _encode_cursor(events[-1])
+        if fields is not None:
+            events = [{f: e.get(f) for f in fields} for e in events]
+        result["events"] = events
+        result["count"] = len(events)
+        result["next_cursor"] = next_cursor
+    
+    result["cached"] = cached
+    return result
+
+def _serialize_result(result: dict, items_key: str = "events") -> dict:
+    """
+    Encode a payload once as JSON (plus gzip) with an ETag
+    The ETag hashes only the items (events by default), plus next_cursor
+    for view pages, so it stays the same across cached/fresh/stale variants
+    and re-syncs that change nothing.
+    """
+    with _timed("serialize"):
+        events = orjson.dumps(result[items_key])
+        meta = orjson.dumps({k: v for k, v in result.items() if k != items_key})
+        body = meta[:-1] + b',"' + items_key.encode() + b'":' + events + b"}"
+        digest = hashlib.sha1(events)
+        if "next_cursor" in result:
+            # Same events but a new next page is a different answer
+            digest.update(orjson.dumps(result["next_cursor"]))
+        return {
+            "body": body,
+            "gzip": gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None,
+            "etag": f'W/"{digest.hexdigest()}"'
+        }
+
+def _serialized_entry(entry: dict, limit: int, view: Optional[tuple] = None) -> dict:
+    """Pre-serialized cache-hit payload for an entry, memoized per (limit, view)"""
+    serialized = entry.setdefault("serialized", {})
+    variant = (limit, view)
+    if variant not in serialized:
+        if len(serialized) >= MAX_SERIALIZED_VARIANTS:
+            serialized.pop(next(iter(serialized)))
+        serialized[variant] = _serialize_result(_shape_result(entry["data"], limit, cached=True, view=view))
+    return serialized[variant]
+
+def _send_serialized(request: Request, serialized: dict, cache_status: str) -> Response:
+    """Send pre-encoded JSON, answering If-None-Match with 304 and gzip when accepted"""
+    headers = {
+        "ETag": serialized["etag"],
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Cache": cache_status
+    }
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if serialized["etag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    if serialized["gzip"] is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=serialized["gzip"], media_type="application/json", headers=headers)
+    return Response(content=serialized["body"], media_type="application/json", headers=headers)
+
+async def _refresh_disasters(key: tuple) -> dict:
+    """Fetch from upstream and store the result in the cache"""
+    limit, = key
+    await _sync_event_store()
+    result = _store_result(limit)
+    _cache_store(key, result)
+    print(f"✅ Cached {result['count']} processed events for limit={limit}")
+    return result
+
+def _finish_refresh(key: tuple, task: asyncio.Task):
+    """Forget a finished refresh and retrieve its exception if nobody awaited it"""
+    if _refresh_tasks.get(key) is task:
+        del _refresh_tasks[key]
+    if not task.cancelled() and task.exception() is not None:
+        print(f"❌ Refresh failed: {task.exception()}")
+
+def _start_refresh(key: tuple) -> asyncio.Task:
+    """Start an upstream refresh, or return an in-flight one that covers `key`"""
+    for k, task in _refresh_tasks.items():
+        if _covers(k, key) and not task.done():
+            return task
+    
+    task = asyncio.ensure_future(_refresh_disasters(key))
+    task.add_done_callback(lambda t: _finish_refresh(key, t))
+    _refresh_tasks[key] = task
+    return task
+
+async def _refresh_disasters_periodically():
+    """Keep the full-set entry warm so clients never wait on the upstream fetch"""
+    key = FULL_SET_KEY
+    while True:
+        entry = _disasters_cache["entries"].get(key)
+        if entry is not None and _entry_age(entry) < _disasters_cache["refresh_interval"]:
+            await asyncio.sleep(_disasters_cache["refresh_interval"] - _entry_age(entry))
+            continue
+        
+        try:
+            # shield() so cancelling the refresher never cancels a shared fetch
+            await asyncio.shield(_start_refresh(key))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await asyncio.sleep(REFRESH_RETRY_DELAY)
+
+async def start_background_refresh():
+    """Start the background EONET refresher"""
+    global _background_refresher
+    if BACKGROUND_REFRESH:
+        _background_refresher = asyncio.ensure_future(_refresh_disasters_periodically())
+
+async def stop_background_refresh():
+    """Stop the background EONET refresher"""
+    if _background_refresher is not None:
+        _background_refresher.cancel()
+
 # Disasters proxy endpoint (bypasses mobile network restrictions)
 @app.get("/api/disasters")
-async def get_disasters(limit: int = 100, days: int = 30, force_refresh: bool = False):
+async def get_disasters(
+    request: Request,
+    limit: int = 100,
+    days: int = 30,
+    force_refresh: bool = False,
+    fields: Optional[str] = None,
+    bbox: Optional[str] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = Query(None, ge=1, le=MAX_DISASTERS_LIMIT)
+):
     """
     Fetch active disasters from NASA EONET API
     Tries multiple API versions and endpoints with fallbacks
-    """
-    from datetime import datetime, timedelta
-    import urllib.request
-    import json
     
-    global _disasters_cache
+    Every limit is a slice of one cached copy of the full event set,
+    which the background refresher keeps warm. `days` is accepted for
+    compatibility but ignored: the event store holds every open event
+    (EONET v3 has no day window for open events). Concurrent refreshes share one upstream
+    fetch, and an expired entry is returned immediately
+    (stale-while-revalidate) while a refresh runs in the background.
+    Cache hits are sent as pre-encoded (optionally gzipped) bytes with an
+    ETag, and a matching If-None-Match gets 304 Not Modified.
+    
+    The optional view parameters are applied to the whole cached event
+    set, so they never cause an upstream fetch of their own; with a view,
+    `limit` is the largest page returned:
+        fields: Comma-separated event fields to return (e.g. id,category,lat,lng)
+        bbox: "min_lng,min_lat,max_lng,max_lat"
+        category: Comma-separated EONET category ids
+        page_size, cursor: Return at most page_size events; pass the
+            response's next_cursor back to get the following page
+    """
+    view = _parse_view(fields, bbox, category, cursor, page_size)
+    limit, = _cache_key(limit)
+    key = FULL_SET_KEY
+    entry = None if force_refresh else _cache_lookup(key)
     
-    # Check cache first (unless force refresh)
-    if not force_refresh and _disasters_cache["data"] is not None:
-        cache_age = (datetime.now() - _disasters_cache["timestamp"]).total_seconds()
+    if entry is not None:
+        cache_age = _entry_age(entry)
+        
         if cache_age < _disasters_cache["ttl"]:
+            _disasters_cache["hits"] += 1
             print(f"✅ Returning cached data ({int(cache_age)}s old)")
-            result = _disasters_cache["data"].copy()
-            result["cached"] = True
-            return result
-    
-    # Try multiple endpoints - v3 first (better data)
-    endpoints = [
-        # v3 API - Better, more detailed data
-        f"https://eonet.gsfc.nasa.gov/api/v3/events?status=open&limit={limit}",
-        # v2.1 API - Fallback
-        f"https://eonet.gsfc.nasa.gov/api/v2.1/events?status=open&limit={limit}&days={days}",
-        # v3 via CORS proxy
-        f"https://api.allorigins.win/raw?url=https://eonet.gsfc.nasa.gov/api/v3/events?status=open&limit={limit}",
-        # v2.1 via CORS proxy
-        f"https://api.allorigins.win/raw?url=https://eonet.gsfc.nasa.gov/api/v2.1/events?status=open&limit={limit}&days={days}",
-        # Another CORS proxy with v3
-        f"https://corsproxy.io/?https://eonet.gsfc.nasa.gov/api/v3/events?status=open&limit={limit}"
-    ]
-    
-    last_error = None
-    
-    for url in endpoints:
-        try:
-            print(f"📡 Trying: {url[:80]}...")
-            
-            req = urllib.request.Request(
-                url,
-                headers={
-                    'User-Agent': 'iAlert-DisasterMonitoring/1.0',
-                    'Accept': 'application/json'
-                }
-            )
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                data = json.loads(response.read().decode())
-                
-                # Handle wrapped responses from proxies
-                if "contents" in data:
-                    data = json.loads(data["contents"])
-                
-                events = data.get("events", [])
-                
-                print(f"✅ Got {len(events)} events from {url[:40]}...")
-                
-                # Process events - handle both v2.1 and v3 formats
-                processed_events = []
-                for evt in events:
-                    # v3 uses "geometry", v2.1 uses "geometries"
-                    geometries = evt.get("geometry") or evt.get("geometries")
-                    
-                    if not geometries or len(geometries) == 0:
-                        continue
-                    
-                    # Get latest geometry
-                    geom = geometries[-1] if isinstance(geometries, list) else geometries
-                    
-                    # v3: coordinates array, v2.1: coordinates in different format
-                    coords = geom.get("coordinates", [])
-                    
-                    if len(coords) < 2:
-                        continue
-                    
-                    # Extract category
-                    categories = evt.get("categories", [])
-                    category = "unknown"
-                    if categories and len(categories) > 0:
-                        # v3: categories[0]["id"], v2.1: categories[0]["id"] (same)
-                        cat_obj = categories[0]
-                        category = cat_obj.get("id") if isinstance(cat_obj, dict) else str(cat_obj)
-                    
-                    # Extract source link
-                    sources = evt.get("sources", [])
-                    link = None
-                    if sources and len(sources) > 0:
-                        source_obj = sources[0]
-                        link = source_obj.get("url") if isinstance(source_obj, dict) else None
-                    
-                    processed_events.append({
-                        "id": evt.get("id"),
-                        "title": evt.get("title"),
-                        "description": evt.get("description", ""),
-                        "category": category,
-                        "lat": coords[1],
-                        "lng": coords[0],
-                        "date": geom.get("date"),
-                        "link": link or evt.get("link")
-                    })
-                
-                result = {
-                    "status": "ok",
-                    "count": len(processed_events),
-                    "events": processed_events,
-                    "source": "eonet",
-                    "api_version": "v2.1" if "v2.1" in url else "v3",
-                    "cached": False
-                }
-                
-                # Cache the result
-                _disasters_cache["data"] = result
-                _disasters_cache["timestamp"] = datetime.now()
-                
-                print(f"✅ Returning {len(processed_events)} processed events")
-                return result
-                
-        except Exception as e:
-            last_error = str(e)
-            print(f"❌ Failed: {last_error}")
-            continue
+            return _send_serialized(request, _serialized_entry(entry, limit, view), "HIT")
+        
+        # Expired: serve the stale payload now and revalidate in the background
+        _disasters_cache["stale_hits"] += 1
+        print(f"♻️ Returning stale data ({int(cache_age)}s old), refreshing in background")
+        _start_refresh(key)
+        result = _shape_result(entry["data"], limit, cached=True, view=view)
+        result["cache_age_seconds"] = int(cache_age)
+        return _send_serialized(request, _serialize_result(result), "STALE")
+    
+    if not force_refresh:
+        _disasters_cache["misses"] += 1
+    
+    try:
+        # shield() so a client disconnect does not cancel the shared fetch
+        data = await asyncio.shield(_start_refresh(key))
+        result = _shape_result(data, limit, cached=False, view=view)
+        print(f"✅ Returning {result['count']} processed events")
+        return _send_serialized(request, _serialize_result(result), "MISS")
+    
+    except Exception as e:
+        last_error = str(e)
+        print(f"❌ All endpoints failed: {last_error}")
     
     # All endpoints failed - return cache if available
-    if _disasters_cache["data"] is not None:
+    entry = _cache_lookup(key)
+    if entry is not None:
         print(f"⚠️ All endpoints failed, returning stale cache")
-        result = _disasters_cache["data"].copy()
-        result["cached"] = True
-        cache_age = int((datetime.now() - _disasters_cache["timestamp"]).total_seconds())
-        result["cache_age_seconds"] = cache_age
-        return result
+        result = _shape_result(entry["data"], limit, cached=True, view=view)
+        result["cache_age_seconds"] = int(_entry_age(entry))
+        return _send_serialized(request, _serialize_result(result), "STALE")
     
     # No cache and all endpoints failed
     raise HTTPException(
@@ -395,20 +2119,428 @@ async def get_disasters(limit: int = 100, days: int = 30, force_refresh: bool =
         detail=f"Unable to fetch disasters from any source. Last error: {last_error}"
     )
 
+# Prometheus metrics
+@app.get("/metrics")
+async def metrics():
+    """Latency histograms, cache and upstream counters in Prometheus text format"""
+    return Response(content=_render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def start_loop_lag_monitor():
+    """Start sampling event-loop lag for /metrics"""
+    global _loop_lag_monitor
+    _loop_lag_monitor = asyncio.ensure_future(_monitor_loop_lag())
+
+async def stop_loop_lag_monitor():
+    """Stop the event-loop lag sampler"""
+    if _loop_lag_monitor is not None:
+        _loop_lag_monitor.cancel()
+
+# Disasters cache statistics
+@app.get("/api/disasters/cache-stats")
+async def get_disasters_cache_stats():
+    """Hit/miss counters and current entries of the disasters cache"""
+    cache = _disasters_cache
+    lookups = cache["hits"] + cache["stale_hits"] + cache["misses"]
+    return {
+        "entries": len(cache["entries"]),
+        "max_entries": cache["max_entries"],
+        "ttl": cache["ttl"],
+        "hits": cache["hits"],
+        "stale_hits": cache["stale_hits"],
+        "misses": cache["misses"],
+        "hit_ratio": (cache["hits"] + cache["stale_hits"]) / lookups if lookups else 0.0,
+        "keys": [
+            {
+                "limit": limit,
+                "events": entry["data"]["count"],
+                "age_seconds": int(_entry_age(entry))
+            }
+            for (limit,), entry in cache["entries"].items()
+        ]
+    }
+
+async def _ensure_event_store():
+    """Sync the event store once if empty, and revalidate it in the background when stale"""
+    key = FULL_SET_KEY
+    last_sync = _event_store["last_sync"]
+    
+    if last_sync is None:
+        try:
+            await asyncio.shield(_start_refresh(key))
+        except Exception as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Unable to fetch disasters from any source. Last error: {str(e)}"
+            )
+    elif (datetime.now() - last_sync).total_seconds() >= _disasters_cache["ttl"]:
+        _start_refresh(key)
+
+# Events near a point
+@app.get("/api/disasters/near")
+async def get_disasters_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(500, gt=0, le=20000),
+    category: Optional[str] = None
+):
+    """
+    Open events within radius_km of a point, nearest first
+    
+    Args:
+        lat, lng: Point to search around (degrees)
+        radius_km: Search radius in kilometres (default 500)
+        category: Optional EONET category id (e.g. wildfires)
+    """
+    await _ensure_event_store()
+    
+    matches = _events_near(lat, lng, radius_km, category)
+    return {
+        "status": "ok",
+        "count": len(matches),
+        "query": {"lat": lat, "lng": lng, "radius_km": radius_km, "category": category},
+        "events": [
+            {**evt, "distance_km": round(distance, 2)}
+            for distance, evt in matches
+        ],
+        "synced_at": _event_store["last_sync"].isoformat()
+    }
+
+# One event's full details
+@app.get("/api/disasters/events/{event_id}")
+async def get_disaster_event(event_id: str):
+    """
+    A single event from the local store, in the /api/disasters format
+    Lets clients load the list with a small fields= projection and fetch
+    title, description and link only for the event the user opens.
+    """
+    await _ensure_event_store()
+    
+    stored = _event_store["events"].get(event_id)
+    processed = _process_events([stored]) if stored else []
+    if not processed:
+        raise HTTPException(status_code=404, detail=f"Event '{event_id}' not found")
+    return {
+        "status": "ok",
+        "event": processed[0],
+        "closed": bool(stored.get("closed")),
+        "synced_at": _event_store["last_sync"].isoformat()
+    }
+
+# Clusters for the globe at one zoom level
+@app.get("/api/disasters/clusters")
+async def get_disaster_clusters(
+    request: Request,
+    zoom: int = Query(0, ge=0, le=MAX_CLUSTER_ZOOM),
+    bbox: Optional[str] = None
+):
+    """
+    Open events grouped into clusters for a zoom level
+    
+    Zoom z uses grid cells of CLUSTER_CELL_DEGREES / 2**z degrees. The
+    hierarchy is precomputed after every sync, so this is a lookup; the
+    whole-globe answer for each zoom is also pre-encoded with an ETag.
+    
+    Args:
+        zoom: 0 (whole globe, 22.5 degree cells) to MAX_CLUSTER_ZOOM
+        bbox: Optional "min_lng,min_lat,max_lng,max_lat" of the visible area
+    """
+    area = _parse_bbox(bbox)
+    await _ensure_event_store()
+    
+    clusters = _cluster_index["levels"][zoom]
+    result = {
+        "status": "ok",
+        "zoom": zoom,
+        "cell_degrees": CLUSTER_CELL_DEGREES / 2 ** zoom,
+        "max_zoom": MAX_CLUSTER_ZOOM,
+        "count": 0,
+        "synced_at": _event_store["last_sync"].isoformat()
+    }
+    
+    if area is None:
+        serialized = _cluster_index["serialized"]
+        if zoom not in serialized:
+            result["count"] = len(clusters)
+            result["clusters"] = clusters
+            serialized[zoom] = _serialize_result(result, items_key="clusters")
+        return _send_serialized(request, serialized[zoom], "HIT")
+    
+    visible = [c for c in clusters if _event_matches(c, None, area)]
+    result["count"] = len(visible)
+    result["clusters"] = visible
+    return result
+
+# Live stream of new, changed and closed events
+@app.get("/api/disasters/stream")
+async def stream_disasters(
+    request: Request,
+    category: Optional[str] = None,
+    bbox: Optional[str] = None,
+    snapshot: bool = True
+):
+    """
+    Server-Sent Events stream of event changes
+    
+    Every time the event store syncs, subscribers receive a `changes`
+    message with `added`, `updated` and `closed` (ids) lists, filtered by
+    their own category and bbox. A `resync` message means the client fell
+    behind and should reload /api/disasters.
+    
+    Args:
+        category: Comma-separated EONET category ids
+        bbox: "min_lng,min_lat,max_lng,max_lat"
+        snapshot: Send the current matching events first as `snapshot`
+    """
+    subscriber = {
+        "queue": asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE),
+        "categories": _parse_categories(category),
+        "bbox": _parse_bbox(bbox)
+    }
+    
+    # Before the 200 goes out, so a failed first sync is a 503 like /near
+    # instead of an empty stream that EventSource silently reconnects to
+    if snapshot:
+        await _ensure_event_store()
+    
+    async def event_source():
+        _subscribers[id(subscriber)] = subscriber
+        try:
+            if snapshot:
+                events = [
+                    orjson.dumps(e).decode() for e in _event_store["open_events"]
+                    if _event_matches(e, subscriber["categories"], subscriber["bbox"])
+                ]
+                yield _sse_message("snapshot", {"events": events})
+            
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(subscriber["queue"].get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            _subscribers.pop(id(subscriber), None)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Zones per vectorized block in _match_zones (bounds the distance matrix size)
+ZONE_CHUNK_SIZE = 256
+
+def _match_zones(
+    lat: np.ndarray,
+    lng: np.ndarray,
+    radius_km: np.ndarray,
+    categories: List[List[str]],
+    index: Optional[dict] = None
+) -> tuple:
+    """
+    Match many zones against every indexed event
+    Distances for a block of zones against the events in its latitude band
+    are computed as one (zones x events) matrix; category filters are a
+    boolean lookup table.
+    
+    Returns:
+        (zone_idx, event_idx, distance_km) arrays, event_idx into index["events"]
+        (index defaults to the live _spatial_index)
+    """
+    index = index if index is not None else _spatial_index
+    n_events = len(index["events"])
+    if n_events == 0 or len(lat) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    
+    # Category table: allowed[zone, category code]
+    vocabulary = {c: i for i, c in enumerate(sorted(set(index["category"])))}
+    event_codes = np.array([vocabulary[c] for c in index["category"]], dtype=np.int64)
+    allowed = np.zeros((len(lat), len(vocabulary)), dtype=bool)
+    for z, selected in enumerate(categories):
+        if not selected:
+            allowed[z] = True
+        else:
+            codes = [vocabulary[c] for c in selected if c in vocabulary]
+            allowed[z, codes] = True
+    
+    # Process zones in latitude order so each block only needs the band
+    # of (latitude-sorted) events it can reach
+    order = np.argsort(lat, kind="stable")
+    lat_rad, lng_rad = np.radians(lat), np.radians(lng)
+    cos_events = np.cos(index["lat_rad"])
+    reach = np.degrees(radius_km / EARTH_RADIUS_KM)
+    out_zone, out_event, out_dist = [], [], []
+    
+    for start in range(0, len(lat), ZONE_CHUNK_SIZE):
+        block = order[start:start + ZONE_CHUNK_SIZE]
+        lo = np.searchsorted(index["lat"], np.min(lat[block] - reach[block]), side="left")
+        hi = np.searchsorted(index["lat"], np.max(lat[block] + reach[block]), side="right")
+        if lo >= hi:
+            continue
+        
+        zlat = lat_rad[block, None]
+        zlng = lng_rad[block, None]
+        a = (
+            np.sin((index["lat_rad"][lo:hi] - zlat) / 2) ** 2
+            + np.cos(zlat) * cos_events[lo:hi] * np.sin((index["lng_rad"][lo:hi] - zlng) / 2) ** 2
+        )
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        
+        mask = (distances <= radius_km[block, None]) & allowed[block][:, event_codes[lo:hi]]
+        zone_idx, event_idx = np.nonzero(mask)
+        out_zone.append(block[zone_idx])
+        out_event.append(event_idx + lo)
+        out_dist.append(distances[zone_idx, event_idx])
+    
+    if not out_zone:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    return np.concatenate(out_zone), np.concatenate(out_event), np.concatenate(out_dist)
+
+def _parse_zone_request(body: bytes) -> List[Zone]:
+    """
+    Validate a /api/zones/match body (runs in a worker thread)
+    Zones are validated in chunks: one pydantic call over 50k zones holds
+    the GIL for ~0.4 s, which would stall the event loop just the same.
+    Errors keep the shape of FastAPI's own 422 body errors.
+    """
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise RequestValidationError([{
+            "type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+            "input": {}, "ctx": {"error": e.msg}
+        }])
+    
+    raw = payload.get("zones") if isinstance(payload, dict) else None
+    if not isinstance(raw, list):
+        try:
+            ZoneMatchRequest.model_validate(payload)
+        except ValidationError as e:
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+            ])
+    if len(raw) > MAX_ZONES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many zones ({len(raw)}). Maximum is {MAX_ZONES}."
+        )
+    
+    zones = []
+    for start in range(0, len(raw), ZONE_VALIDATE_CHUNK):
+        try:
+            zones.extend(_zone_list.validate_python(raw[start:start + ZONE_VALIDATE_CHUNK]))
+        except ValidationError as e:
+            raise RequestValidationError([
+                {**error, "loc": ("body", "zones", error["loc"][0] + start, *error["loc"][1:])}
+                for error in e.errors(include_url=False)
+            ])
+    return zones
+
+def _zone_match_response(zones: List[Zone], index: dict, synced_at: str) -> bytes:
+    """Match zones against an index snapshot and encode the response (runs in a worker thread)"""
+    zone_idx, event_idx, distances = _match_zones(
+        np.array([z.lat for z in zones], dtype=np.float64),
+        np.array([z.lng for z in zones], dtype=np.float64),
+        np.array([z.radius_km for z in zones], dtype=np.float64),
+        [z.categories for z in zones],
+        index
+    )
+    
+    # Keep the nearest zone for every (user, event) pair
+    best = {}   # (user_id, event_idx) -> (distance, zone_idx)
+    for z, e, d in zip(zone_idx.tolist(), event_idx.tolist(), distances.tolist()):
+        key = (zones[z].user_id, e)
+        if key not in best or d < best[key][0]:
+            best[key] = (d, z)
+    
+    events = index["events"]
+    users = {}
+    matched_events = {}
+    for (user_id, e), (d, z) in best.items():
+        event = events[e]
+        matched_events[event["id"]] = event
+        users.setdefault(user_id, []).append({
+            "event_id": event["id"],
+            "zone": z,
+            "distance_km": round(d, 2)
+        })
+    
+    for matches in users.values():
+        matches.sort(key=lambda m: m["distance_km"])
+    
+    return orjson.dumps({
+        "status": "ok",
+        "zones": len(zones),
+        "users_matched": len(users),
+        "matches": users,
+        "events": matched_events,
+        "synced_at": synced_at
+    })
+
+def _inline_schema(model) -> dict:
+    """JSON schema of a model with its nested $defs inlined, for openapi_extra"""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    
+    def inline(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref", "")
+            if ref.startswith("#/$defs/"):
+                return inline(defs[ref[len("#/$defs/"):]])
+            return {k: inline(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [inline(v) for v in node]
+        return node
+    
+    return inline(schema)
+
+# Bulk zone-to-event matching for alert fan-out
+# The body is read raw so validation, matching and encoding (seconds for
+# 50k zones) run in a worker thread instead of blocking the event loop.
+@app.post(
+    "/api/zones/match",
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _inline_schema(ZoneMatchRequest)}}
+    }}
+)
+async def match_zones(request: Request):
+    """
+    Match a batch of interest zones against the current open events
+    
+    Args:
+        request: ZoneMatchRequest body with zones (user_id, lat, lng, radius_km, categories)
+    
+    Returns:
+        Matches grouped by user (each event once per user, nearest zone wins)
+        plus the matched events keyed by id
+    """
+    zones = await asyncio.to_thread(_parse_zone_request, await request.body())
+    
+    await _ensure_event_store()
+    
+    # Snapshot the index: a sync may rebuild it while the worker runs
+    index = dict(_spatial_index)
+    content = await asyncio.to_thread(
+        _zone_match_response, zones, index, _event_store["last_sync"].isoformat()
+    )
+    return Response(content=content, media_type="application/json")
+
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {
+    return JSONResponse(status_code=404, content={
         "error": "Not found",
         "detail": str(exc.detail) if hasattr(exc, 'detail') else "Resource not found"
-    }
+    })
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
-    return {
+    return JSONResponse(status_code=500, content={
         "error": "Internal server error",
         "detail": "An unexpected error occurred"
-    }
+    })
 
 # For local development
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+"""
+Modelos exportados a .npz (sin pickle) y su inferencia solo con NumPy
+entrenar.py los escribe (--frecuencias, --compilar) y main.py los sirve, así
+que el formato de los archivos y el recorrido de los árboles viven solo aquí.
+Este módulo no debe importar pandas ni scikit-learn: X puede ser un
+DataFrame o un dict {columna: lista de valores}.
+"""
+
+import numpy as np
+
+
+class FrecuenciasNpz:
+    """
+    P(tipo de desastre | región, país) a partir de conteos suavizados.
+    Un país nunca visto recibe la distribución de su región y una región
+    nunca vista, la global. Misma interfaz predict_proba que el pipeline
+    de RandomForest; el entrenamiento está en entrenar.ModeloFrecuencias.
+    """
+
+    def __init__(self, alpha=1.0, beta=1.0):
+        self.alpha = alpha  # peso de la región en la distribución de cada país
+        self.beta = beta    # peso de la distribución global en cada región
+
+    @property
+    def categories_(self):
+        """(regiones, países) conocidos, como OneHotEncoder.categories_"""
+        return self.regiones_, sorted({c for _, c in self.pares_})
+
+    def _indexar(self):
+        self._indice_region = {r: i for i, r in enumerate(self.regiones_)}
+        self._indice_par = {p: i for i, p in enumerate(self.pares_)}
+
+    def predict_proba(self, X):
+        filas = []
+        for region, pais in zip(X['Region'], X['Country']):
+            i = self._indice_par.get((region, pais))
+            if i is not None:
+                filas.append(self.proba_par_[i])
+            elif region in self._indice_region:
+                filas.append(self.proba_region_[self._indice_region[region]])
+            else:
+                filas.append(self.proba_global_)
+        return np.vstack(filas)
+
+    def guardar(self, ruta, clases):
+        """Guarda conteos y probabilidades en un .npz (sin pickle)"""
+        np.savez(
+            ruta,
+            classes=np.asarray(clases, dtype=str),
+            alpha=self.alpha,
+            beta=self.beta,
+            regions=np.asarray(self.regiones_, dtype=str),
+            pair_regions=np.asarray([r for r, _ in self.pares_], dtype=str),
+            pair_countries=np.asarray([c for _, c in self.pares_], dtype=str),
+            region_counts=self.conteos_region_,
+            pair_counts=self.conteos_par_,
+            region_proba=self.proba_region_,
+            pair_proba=self.proba_par_,
+            global_proba=self.proba_global_,
+            version=self.version_,
+            deltas=np.asarray(self.deltas_, dtype=str),
+        )
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            modelo = cls(alpha=float(datos['alpha']), beta=float(datos['beta']))
+            modelo.clases_ = [str(c) for c in datos['classes']]
+            modelo.regiones_ = [str(r) for r in datos['regions']]
+            modelo.pares_ = [(str(r), str(c)) for r, c in zip(datos['pair_regions'], datos['pair_countries'])]
+            modelo.conteos_region_ = datos['region_counts']
+            modelo.conteos_par_ = datos['pair_counts']
+            modelo.proba_region_ = datos['region_proba']
+            modelo.proba_par_ = datos['pair_proba']
+            modelo.proba_global_ = datos['global_proba']
+            modelo.version_ = int(datos['version']) if 'version' in datos.files else 1
+            modelo.deltas_ = [str(h) for h in datos['deltas']] if 'deltas' in datos.files else []
+        modelo._indexar()
+        return modelo
+
+
+class BosqueCompilado:
+    """
+    Un pipeline ColumnTransformer + bosque de árboles en arreglos NumPy
+    planos: los nodos de todos los árboles en un solo arreglo y un mapa
+    categoría -> columna por cada variable categórica. Las variables
+    numéricas (passthrough o StandardScaler) se guardan con su media y
+    escala. Misma interfaz predict_proba que el pipeline; la exportación
+    desde scikit-learn está en entrenar.ModeloCompilado.
+    """
+
+    FILAS_ESCALAR = 4   # hasta cuántas filas se recorren los árboles en Python
+
+    @property
+    def categories_(self):
+        """(regiones, países) del codificador, o None si las entradas son otras"""
+        if self.categoricas_[:2] == ['Region', 'Country']:
+            return self.categorias_[0], self.categorias_[1]
+        return None
+
+    def _preparar(self):
+        self._indices = [
+            {c: inicio + i for i, c in enumerate(categorias)}
+            for categorias, inicio in zip(self.categorias_, self.columnas_categoria_)
+        ]
+        # Hijos intercalados: hijos[2 * nodo] = izquierdo, hijos[2 * nodo + 1] = derecho
+        self._hijos = np.stack([self.izquierdo_, self.derecho_], axis=1).ravel()
+        # Copias en listas de Python para recorrer pocas filas sin NumPy
+        self._listas = (self.feature_.tolist(), self.umbral_.tolist(),
+                        self.izquierdo_.tolist(), self.derecho_.tolist(), self.raices_.tolist())
+
+    def _transformar(self, X):
+        """Matriz de entrada de los árboles (float32, como scikit-learn)"""
+        n = len(X[(self.categoricas_ + self.numericas_)[0]])
+        matriz = np.zeros((n, self.n_columnas_), dtype=np.float32)
+        for columna, indice in zip(self.categoricas_, self._indices):
+            # Una categoría desconocida deja su bloque en ceros (handle_unknown='ignore')
+            posiciones = np.fromiter((indice.get(v, -1) for v in X[columna]), dtype=np.int64, count=n)
+            filas = np.nonzero(posiciones >= 0)[0]
+            matriz[filas, posiciones[filas]] = 1.0
+        for columna, j, media, escala in zip(self.numericas_, self.columnas_numericas_, self.medias_, self.escalas_):
+            matriz[:, j] = (np.asarray(X[columna], dtype=np.float64) - media) / escala
+        return matriz
+
+    def _hojas_por_fila(self, matriz):
+        """Recorre cada árbol en Python: lo más rápido para una o pocas filas"""
+        feature, umbral, izquierdo, derecho, raices = self._listas
+        hojas = []
+        for fila in matriz.tolist():
+            for nodo in raices:
+                f = feature[nodo]
+                while f >= 0:
+                    nodo = izquierdo[nodo] if fila[f] <= umbral[nodo] else derecho[nodo]
+                    f = feature[nodo]
+                hojas.append(nodo)
+        return np.asarray(hojas, dtype=np.int64)
+
+    def _hojas_vectorizado(self, matriz):
+        """
+        Todos los pares (fila, árbol) bajan un nivel por iteración; los que
+        ya llegaron a una hoja salen del conjunto activo
+        """
+        n, n_arboles = len(matriz), len(self.raices_)
+        plana = matriz.ravel()
+        nodos = np.tile(self.raices_, n).astype(np.int64)
+        base = np.repeat(np.arange(n, dtype=np.int64) * matriz.shape[1], n_arboles)
+        activos = np.arange(len(nodos))
+        feature = self.feature_.take(nodos)
+        while True:
+            internos = feature >= 0
+            if not internos.all():
+                activos, feature = activos[internos], feature[internos]
+                if not activos.size:
+                    break
+            nodo = nodos.take(activos)
+            derecha = plana.take(base.take(activos) + feature) > self.umbral_.take(nodo)
+            nodo = self._hijos.take(nodo * 2 + derecha)
+            nodos[activos] = nodo
+            feature = self.feature_.take(nodo)
+        return nodos
+
+    def predict_proba(self, X):
+        matriz = self._transformar(X)
+        if len(matriz) <= self.FILAS_ESCALAR:
+            hojas = self._hojas_por_fila(matriz)
+        else:
+            hojas = self._hojas_vectorizado(matriz)
+        return self.valor_[hojas].reshape(len(matriz), len(self.raices_), -1).mean(axis=1)
+
+    def guardar(self, ruta):
+        """Guarda el modelo en un .npz (sin pickle)"""
+        np.savez(
+            ruta,
+            classes=np.asarray(self.clases_, dtype=str),
+            n_columns=self.n_columnas_,
+            categorical_features=np.asarray(self.categoricas_, dtype=str),
+            categories=np.asarray([c for categorias in self.categorias_ for c in categorias], dtype=str),
+            category_offsets=np.cumsum([0] + [len(c) for c in self.categorias_]),
+            category_columns=np.asarray(self.columnas_categoria_, dtype=np.int64),
+            numeric_features=np.asarray(self.numericas_, dtype=str),
+            numeric_columns=np.asarray(self.columnas_numericas_, dtype=np.int64),
+            numeric_mean=np.asarray(self.medias_, dtype=np.float64),
+            numeric_scale=np.asarray(self.escalas_, dtype=np.float64),
+            feature=self.feature_,
+            threshold=self.umbral_,
+            left=self.izquierdo_,
+            right=self.derecho_,
+            value=self.valor_,
+            roots=self.raices_,
+        )
+
+    @classmethod
+    def cargar(cls, ruta):
+        modelo = cls()
+        with np.load(ruta, allow_pickle=False) as datos:
+            modelo.clases_ = [str(c) for c in datos['classes']]
+            modelo.n_columnas_ = int(datos['n_columns'])
+            modelo.categoricas_ = [str(c) for c in datos['categorical_features']]
+            categorias = [str(c) for c in datos['categories']]
+            desplazamientos = datos['category_offsets'].tolist()
+            modelo.categorias_ = [categorias[a:b] for a, b in zip(desplazamientos, desplazamientos[1:])]
+            modelo.columnas_categoria_ = datos['category_columns'].tolist()
+            modelo.numericas_ = [str(c) for c in datos['numeric_features']]
+            modelo.columnas_numericas_ = datos['numeric_columns'].tolist()
+            modelo.medias_ = datos['numeric_mean'].tolist()
+            modelo.escalas_ = datos['numeric_scale'].tolist()
+            modelo.feature_ = datos['feature']
+            modelo.umbral_ = datos['threshold']
+            modelo.izquierdo_ = datos['left']
+            modelo.derecho_ = datos['right']
+            modelo.valor_ = datos['value']
+            modelo.raices_ = datos['roots']
+        modelo._preparar()
+        return modelo
@@ -2,12 +2,118 @@ import sys
 import joblib
 import pandas as pd
 import json
+import os
+import socketserver
+
+# Uso:
+#   python predict.py <region> <country>       -> una predicción y termina
+#   python predict.py --serve                  -> worker persistente por stdin/stdout
+#   python predict.py --serve --socket <ruta>  -> worker persistente en un Unix socket
+#
+# En modo worker el modelo se carga una sola vez y cada línea de entrada es
+# un JSON {"id": ..., "region": ..., "country": ...}. Cada respuesta es una
+# línea JSON con el mismo "id", así que se pueden enviar varias peticiones
+# sin esperar la respuesta de la anterior.
 
 # Cargar modelo entrenado
 modelo = joblib.load("modelo_desastres.pkl")
 codificador = joblib.load("codificador_labels.pkl")
 
+
+def predecir(region, country):
+    """Devuelve {tipo de desastre: probabilidad} o {"error": ...}"""
+    # Preparar entrada
+    df = pd.DataFrame({
+        "Region": [region],
+        "Country": [country]
+    })
+
+    try:
+        # Obtener probabilidades
+        probabilities = modelo.predict_proba(df)[0]
+        labels = codificador.classes_
+
+        # Convertir a dict
+        return {
+            labels[i]: float(probabilities[i])
+            for i in range(len(labels))
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def procesar_linea(linea):
+    """Atiende una petición NDJSON y devuelve la línea de respuesta"""
+    try:
+        peticion = json.loads(linea)
+    except ValueError as e:
+        return json.dumps({"id": None, "error": f"Invalid JSON: {e}"})
+
+    if not isinstance(peticion, dict):
+        return json.dumps({"id": None, "error": "Request must be a JSON object"})
+
+    id_peticion = peticion.get("id")
+    region = peticion.get("region")
+    country = peticion.get("country")
+
+    if not region or not country:
+        return json.dumps({"id": id_peticion, "error": "Missing arguments"})
+
+    resultado = predecir(region, country)
+    if "error" in resultado:
+        return json.dumps({"id": id_peticion, "error": resultado["error"]})
+    return json.dumps({"id": id_peticion, "result": resultado})
+
+
+def servir_stdio():
+    """Lee peticiones de stdin hasta EOF y responde por stdout"""
+    for linea in sys.stdin:
+        linea = linea.strip()
+        if not linea:
+            continue
+        print(procesar_linea(linea), flush=True)
+
+
+class ManejadorSocket(socketserver.StreamRequestHandler):
+    """Una conexión puede enviar muchas peticiones NDJSON"""
+
+    def handle(self):
+        for linea in self.rfile:
+            linea = linea.decode("utf-8").strip()
+            if not linea:
+                continue
+            self.wfile.write((procesar_linea(linea) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def servir_socket(ruta):
+    """Atiende conexiones concurrentes en un Unix socket hasta Ctrl+C"""
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+    servidor = socketserver.ThreadingUnixStreamServer(ruta, ManejadorSocket)
+    servidor.daemon_threads = True
+    print(json.dumps({"status": "ready", "socket": ruta}), flush=True)
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
 # Obtener argumentos enviados desde Node.js
+if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+    if len(sys.argv) >= 4 and sys.argv[2] == "--socket":
+        servir_socket(sys.argv[3])
+    else:
+        servir_stdio()
+    sys.exit()
+
 if len(sys.argv) < 3:
     print(json.dumps({"error": "Missing arguments"}))
     sys.exit()
@@ -15,25 +121,5 @@ if len(sys.argv) < 3:
 region = sys.argv[1]
 country = sys.argv[2]
 
-# Preparar entrada
-df = pd.DataFrame({
-    "Region": [region],
-    "Country": [country]
-})
-
-try:
-    # Obtener probabilidades
-    probabilities = modelo.predict_proba(df)[0]
-    labels = codificador.classes_
-
-    # Convertir a dict
-    resultados = {
-        labels[i]: float(probabilities[i])
-        for i in range(len(labels))
-    }
-
-    # Imprimir JSON limpio para Node.js
-    print(json.dumps(resultados))
-
-except Exception as e:
-    print(json.dumps({"error": str(e)}))
+# Imprimir JSON limpio para Node.js
+print(json.dumps(predecir(region, country)))
@@ -5,11 +5,22 @@ Run this locally to verify everything works before deploying to Render
 
 import requests
 import json
+import math
+import os
+import re
+import time
 
 # Change this to your Render URL after deployment
 # For local testing: http://localhost:8000
 BASE_URL = "http://localhost:8000"
 
+# eonet_stub.py the server was started against (see README); the stream
+# check opens a new event there. If it is not running that part is skipped.
+EONET_STUB_URL = "http://127.0.0.1:9000/api"
+
+# Same value as the server's ADMIN_TOKEN, to check the admin endpoints
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
 def test_health_check():
     """Test the health check endpoint"""
     print("\n🔍 Testing Health Check...")
@@ -94,6 +105,385 @@ def test_model_info():
         print(f"❌ Error: {e}")
         return False
 
+def test_search_countries(query="jap", expected="Japan"):
+    """Test the country typeahead"""
+    print(f"\n🔎 Testing Country Search for '{query}'...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/countries/search", params={"q": query})
+        print(f"Status: {response.status_code}")
+        data = response.json()
+        countries = [r["country"] for r in data["results"]]
+        print(f"Results: {countries}")
+        if expected not in countries:
+            print(f"❌ Expected {expected} in the results")
+            return False
+        
+        # Case-insensitive, and the continent filter drops other regions
+        response = requests.get(f"{BASE_URL}/api/countries/search", params={"q": query.upper(), "continent": "Africa"})
+        if expected in [r["country"] for r in response.json()["results"]]:
+            print(f"❌ {expected} should not match continent=Africa")
+            return False
+        return response.status_code == 200
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_unknown_country():
+    """Test that a misspelled country is rejected with suggestions"""
+    print("\n❓ Testing Unknown Country...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/predict-disaster",
+            json={"region": "Asia", "country": "Japn"}
+        )
+        print(f"Status: {response.status_code}")
+        detail = response.json()["detail"]
+        print(f"Suggestions: {detail['suggestions']}")
+        return response.status_code == 422 and "Japan" in detail["suggestions"]
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_disasters_cache():
+    """Test that a smaller limit is a cache hit with the first events of a larger one"""
+    print("\n🗄️  Testing Disasters Cache...")
+    try:
+        full = requests.get(f"{BASE_URL}/api/disasters", params={"limit": 50, "force_refresh": "true"})
+        print(f"Status: {full.status_code}")
+        part = requests.get(f"{BASE_URL}/api/disasters", params={"limit": 20})
+        print(f"X-Cache: {full.headers.get('X-Cache')} -> {part.headers.get('X-Cache')}")
+        
+        full_ids = [e["id"] for e in full.json()["events"]]
+        part_ids = [e["id"] for e in part.json()["events"]]
+        print(f"Events: {len(full_ids)} and {len(part_ids)}")
+        if part.headers.get("X-Cache") != "HIT" or part_ids != full_ids[:20]:
+            print("❌ limit=20 should be a cache hit with the first 20 events of limit=50")
+            return False
+        
+        # Every limit is cut from the one full-set entry
+        stats = requests.get(f"{BASE_URL}/api/disasters/cache-stats").json()
+        return len(stats["keys"]) == 1
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_disasters_paging(page_size=7):
+    """Test that following next_cursor visits every event exactly once, newest first"""
+    print(f"\n📄 Testing Disasters Paging (page_size={page_size})...")
+    try:
+        everything = requests.get(f"{BASE_URL}/api/disasters", params={"fields": "id,date", "limit": 1000}).json()
+        expected = [e["id"] for e in everything["events"]]
+        
+        seen, dates, cursor, pages = [], [], None, 0
+        while True:
+            params = {"fields": "id,date", "page_size": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            data = requests.get(f"{BASE_URL}/api/disasters", params=params).json()
+            seen += [e["id"] for e in data["events"]]
+            dates += [e["date"] for e in data["events"]]
+            pages += 1
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+        
+        print(f"Pages: {pages}, events: {len(seen)} of {len(expected)}")
+        if seen != expected or len(set(seen)) != len(seen):
+            print("❌ Pages should cover every event once, in order")
+            return False
+        return dates == sorted(dates, reverse=True)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_disasters_bbox_antimeridian():
+    """Test that a bbox with min_lng > max_lng wraps across the antimeridian"""
+    print("\n🌐 Testing Disasters bbox Across the Antimeridian...")
+    try:
+        everything = requests.get(f"{BASE_URL}/api/disasters", params={"fields": "id,lng", "limit": 1000}).json()
+        expected = [e["id"] for e in everything["events"] if e["lng"] >= 170 or e["lng"] <= -170]
+        
+        data = requests.get(
+            f"{BASE_URL}/api/disasters",
+            params={"fields": "id,lng", "bbox": "170,-90,-170,90", "limit": 1000}
+        ).json()
+        ids = [e["id"] for e in data["events"]]
+        print(f"Events in bbox: {len(ids)} (expected {len(expected)})")
+        return ids == expected
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_predict_batch():
+    """Test that batch results keep the input order and report bad items one by one"""
+    print("\n📦 Testing Batch Prediction...")
+    try:
+        items = [
+            {"region": "Asia", "country": "Japan"},
+            {"region": "Asia", "country": "Japn"},
+            {"region": "Americas", "country": ""},
+            {"region": "Americas", "country": "Chile"},
+            {"region": "asia", "country": "japan"},
+        ]
+        response = requests.post(f"{BASE_URL}/api/predict-disaster/batch", json={"items": items})
+        print(f"Status: {response.status_code}")
+        results = response.json()["results"]
+        statuses = [r["status"] for r in results]
+        countries = [r["country"] for r in results]
+        print(f"Results: {list(zip(countries, statuses))}")
+        if statuses != ["ok", "error", "error", "ok", "ok"] or countries != ["Japan", "Japn", "", "Chile", "Japan"]:
+            print("❌ Results should follow the input order, with an error for each bad item")
+            return False
+        
+        # Batched scores match the single-item endpoint
+        single = requests.post(f"{BASE_URL}/api/predict-disaster", json=items[0]).json()
+        return results[0]["predictions"] == single["predictions"] == results[4]["predictions"]
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km (same Earth radius as main.py)"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(min(a, 1.0)))
+
+def test_disasters_near(lat=35.0, lng=139.0, radius_km=3000):
+    """Test that /near returns exactly the events within the radius, nearest first"""
+    print(f"\n📍 Testing Disasters Near ({lat}, {lng}, {radius_km} km)...")
+    try:
+        everything = requests.get(f"{BASE_URL}/api/disasters", params={"fields": "id,lat,lng", "limit": 1000}).json()
+        expected = sorted(
+            (_haversine_km(lat, lng, e["lat"], e["lng"]), e["id"]) for e in everything["events"]
+        )
+        expected = [(d, i) for d, i in expected if d <= radius_km]
+        
+        response = requests.get(
+            f"{BASE_URL}/api/disasters/near",
+            params={"lat": lat, "lng": lng, "radius_km": radius_km}
+        )
+        print(f"Status: {response.status_code}")
+        events = response.json()["events"]
+        print(f"Events: {len(events)} (expected {len(expected)})")
+        if [e["id"] for e in events] != [i for _, i in expected]:
+            print("❌ Events should match a brute-force distance check, nearest first")
+            return False
+        return all(abs(e["distance_km"] - d) < 0.01 for e, (d, _) in zip(events, expected))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_zones_match():
+    """Test that each user gets every event in any of their zones once, from the nearest zone"""
+    print("\n🎯 Testing Zones Match...")
+    try:
+        zones = [
+            {"user_id": "ana", "lat": 10.0, "lng": 0.0, "radius_km": 2500},
+            {"user_id": "ana", "lat": 20.0, "lng": 10.0, "radius_km": 2500},
+            {"user_id": "ben", "lat": 0.0, "lng": 179.0, "radius_km": 4000, "categories": ["volcanoes"]},
+        ]
+        everything = requests.get(f"{BASE_URL}/api/disasters", params={"fields": "id,lat,lng,category", "limit": 1000}).json()
+        expected = {}
+        for i, zone in enumerate(zones):
+            for e in everything["events"]:
+                if zone.get("categories") and e["category"] not in zone["categories"]:
+                    continue
+                d = _haversine_km(zone["lat"], zone["lng"], e["lat"], e["lng"])
+                best = expected.setdefault(zone["user_id"], {}).get(e["id"])
+                if d <= zone["radius_km"] and (best is None or d < best[0]):
+                    expected[zone["user_id"]][e["id"]] = (d, i)
+        
+        response = requests.post(f"{BASE_URL}/api/zones/match", json={"zones": zones})
+        print(f"Status: {response.status_code}")
+        data = response.json()
+        for user, events in expected.items():
+            matches = data["matches"].get(user, [])
+            print(f"{user}: {len(matches)} events (expected {len(events)})")
+            if {m["event_id"]: m["zone"] for m in matches} != {i: z for i, (_, z) in events.items()}:
+                print(f"❌ {user} should get each event once, from the nearest zone")
+                return False
+            if [m["distance_km"] for m in matches] != sorted(m["distance_km"] for m in matches):
+                print(f"❌ {user}'s matches should be nearest first")
+                return False
+        
+        # A zone outside the valid range rejects the request
+        bad = requests.post(f"{BASE_URL}/api/zones/match", json={"zones": [{"user_id": "x", "lat": 100, "lng": 0}]})
+        print(f"Invalid zone status: {bad.status_code}")
+        return bad.status_code == 422
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def _next_sse_message(lines):
+    """(event, data) of the next Server-Sent Events message, or (None, None) at a heartbeat"""
+    event, data = None, None
+    for line in lines:
+        if line.startswith(":"):
+            return None, None   # nothing was sent for a whole heartbeat interval
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+        elif not line and event is not None:
+            return event, data
+    return None, None
+
+def test_disasters_stream():
+    """Test the stream snapshot and the changes pushed after a sync"""
+    print("\n📡 Testing Disasters Stream...")
+    try:
+        everything = requests.get(f"{BASE_URL}/api/disasters", params={"fields": "id", "limit": 1000}).json()
+        stream = requests.get(f"{BASE_URL}/api/disasters/stream", stream=True, timeout=30)
+        print(f"Status: {stream.status_code}")
+        try:
+            lines = stream.iter_lines(decode_unicode=True)
+            event, data = _next_sse_message(lines)
+            print(f"{event}: {len(data['events'])} events")
+            if event != "snapshot" or {e["id"] for e in data["events"]} != {e["id"] for e in everything["events"]}:
+                print("❌ The snapshot should hold every open event")
+                return False
+            
+            try:
+                added = requests.post(f"{EONET_STUB_URL}/events").json()
+            except requests.exceptions.ConnectionError:
+                print("⚠️  EONET stub not reachable, changes not checked")
+                return True
+            
+            # The next sync pushes the new event to the open stream (syncs
+            # requested within 5s of the previous one are coalesced)
+            time.sleep(5)
+            requests.get(f"{BASE_URL}/api/disasters", params={"force_refresh": "true"})
+            event, data = _next_sse_message(lines)
+            print(f"{event}: {data}")
+            return event == "changes" and [e["id"] for e in data["added"]] == [added["id"]] and not data["closed"]
+        finally:
+            stream.close()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_disasters_etag():
+    """Test that sending the ETag back gets 304 Not Modified, per view"""
+    print("\n🏷️  Testing Disasters ETag...")
+    try:
+        first = requests.get(f"{BASE_URL}/api/disasters")
+        etag = first.headers.get("ETag")
+        again = requests.get(f"{BASE_URL}/api/disasters", headers={"If-None-Match": etag})
+        print(f"ETag: {etag} -> {again.status_code}")
+        if again.status_code != 304 or again.content:
+            print("❌ A matching If-None-Match should get an empty 304")
+            return False
+        
+        # Another view has its own tag, and an old tag gets the full body
+        page = requests.get(f"{BASE_URL}/api/disasters", params={"page_size": 5}, headers={"If-None-Match": etag})
+        print(f"page_size=5 with the same tag: {page.status_code}")
+        return page.status_code == 200 and page.headers.get("ETag") != etag
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_reload_model():
+    """Test that model reload needs the admin token and swaps in a freshly loaded model"""
+    print("\n🔄 Testing Model Reload...")
+    try:
+        for token in (None, "wrong-token"):
+            headers = {"X-Admin-Token": token} if token else {}
+            response = requests.post(f"{BASE_URL}/api/admin/reload-model", headers=headers)
+            print(f"Token {token!r}: {response.status_code}")
+            if response.status_code != 403:
+                print("❌ Reload without a valid token should be forbidden")
+                return False
+        
+        if not ADMIN_TOKEN:
+            print("⚠️  ADMIN_TOKEN not set, reload itself not checked")
+            return True
+        
+        before = requests.get(f"{BASE_URL}/api/model-info").json()
+        response = requests.post(f"{BASE_URL}/api/admin/reload-model", headers={"X-Admin-Token": ADMIN_TOKEN})
+        print(f"Status: {response.status_code}")
+        data = response.json()
+        print(f"Version: {data['previous_version']} -> {data['version']}")
+        after = requests.get(f"{BASE_URL}/api/model-info").json()
+        return (
+            response.status_code == 200
+            and data["previous_version"] == before["version"]
+            and after["version"] == data["version"]
+            and after["loaded_at"] == data["loaded_at"] != before["loaded_at"]
+        )
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_metrics():
+    """Test that /metrics is valid Prometheus text with per-route request histograms"""
+    print("\n📈 Testing Metrics...")
+    try:
+        for event_id in ("NOPE_1", "NOPE_2"):
+            requests.get(f"{BASE_URL}/api/disasters/events/{event_id}")
+        response = requests.get(f"{BASE_URL}/metrics")
+        print(f"Status: {response.status_code} ({response.headers.get('Content-Type')})")
+        
+        declared, samples = {}, []
+        for line in response.text.splitlines():
+            if line.startswith("# TYPE "):
+                _, _, name, kind = line.split(" ")
+                declared[name] = kind
+            elif line and not line.startswith("#"):
+                match = re.fullmatch(r'([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})? (\S+)', line)
+                if match is None:
+                    print(f"❌ Malformed line: {line}")
+                    return False
+                samples.append((match.group(1), match.group(2) or "", float(match.group(3))))
+        
+        for name, _, _ in samples:
+            base = re.sub(r"_(bucket|sum|count)$", "", name)
+            if name not in declared and base not in declared:
+                print(f"❌ {name} has no # TYPE line")
+                return False
+        
+        # Histogram buckets are cumulative and end at _count
+        buckets = {}
+        for name, labels, value in samples:
+            if name.endswith("_bucket"):
+                labels = re.sub(r',?le="[^"]*"', "", labels).replace("{,", "{")
+                series = (name[:-len("_bucket")], "" if labels == "{}" else labels)
+                buckets.setdefault(series, []).append(value)
+        counts = {(n[:-len("_count")], l): v for n, l, v in samples if n.endswith("_count")}
+        for series, values in buckets.items():
+            if values != sorted(values) or values[-1] != counts.get(series):
+                print(f"❌ Buckets of {series} are not cumulative up to _count")
+                return False
+        
+        # Requests are labelled by route template, not by raw path
+        route = [v for n, l, v in samples if n == "ialert_http_request_duration_seconds_count"
+                 and 'endpoint="/api/disasters/events/{event_id}"' in l and 'status="404"' in l]
+        print(f"Samples: {len(samples)}, /events/{{event_id}} 404s: {route}")
+        return bool(route) and route[0] >= 2 and "NOPE_1" not in response.text
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_disaster_clusters():
+    """Test that at every zoom level the cluster counts add up to the open events"""
+    print("\n🫧 Testing Disaster Clusters...")
+    try:
+        events = requests.get(f"{BASE_URL}/api/disasters", params={"fields": "id", "limit": 1000}).json()["events"]
+        zoom, max_zoom, previous = 0, 0, 0
+        while zoom <= max_zoom:
+            data = requests.get(f"{BASE_URL}/api/disasters/clusters", params={"zoom": zoom}).json()
+            max_zoom = data["max_zoom"]
+            total = sum(c["count"] for c in data["clusters"])
+            print(f"Zoom {zoom}: {data['count']} clusters, {total} events (expected {len(events)})")
+            if total != len(events) or data["count"] < previous:
+                print("❌ Clusters should cover every event once and only split as the zoom grows")
+                return False
+            previous = data["count"]
+            zoom += 1
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
 def run_all_tests():
     """Run all tests"""
     print("=" * 60)
@@ -106,6 +496,19 @@ def run_all_tests():
         ("Get Countries", lambda: test_get_countries("Asia")),
         ("Predict Disaster", lambda: test_predict_disaster("Asia", "Japan")),
         ("Model Info", test_model_info),
+        ("Search Countries", lambda: test_search_countries("jap", "Japan")),
+        ("Unknown Country", test_unknown_country),
+        ("Disasters Cache", test_disasters_cache),
+        ("Disasters Paging", lambda: test_disasters_paging(7)),
+        ("Disasters bbox Antimeridian", test_disasters_bbox_antimeridian),
+        ("Batch Prediction", test_predict_batch),
+        ("Disasters Near", lambda: test_disasters_near(-15.0, 178.0, 3000)),
+        ("Zones Match", test_zones_match),
+        ("Disasters Stream", test_disasters_stream),
+        ("Disasters ETag", test_disasters_etag),
+        ("Model Reload", test_reload_model),
+        ("Metrics", test_metrics),
+        ("Disaster Clusters", test_disaster_clusters),
     ]
     
     results = []
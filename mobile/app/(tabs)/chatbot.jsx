@@ -101,33 +101,45 @@ export default function ChatBot() {
         body: JSON.stringify({ region, country: p }),
       });
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const data = await response.json();
-
-      if (!data.predictions) {
+      // Unknown region or country: the server answers with suggestions
+      if (response.status === 422) {
+        const { detail } = await response.json();
+        const sugerencias = detail?.suggestions?.length
+          ? ` ¿Quisiste decir: ${detail.suggestions.join(", ")}?`
+          : "";
         setMessages((m) => [
           ...m,
-          { from: "bot", text: "❌ Error obteniendo predicción." },
+          { from: "bot", text: `❓ No reconozco "${p}" en ${region}.${sugerencias}` },
         ]);
       } else {
-        // Format predictions nicely
-        let texto = `📊 *Predicción para ${p}, ${region}:*\n\n`;
-
-        // Sort predictions by probability (highest first)
-        const sortedPredictions = Object.entries(data.predictions)
-          .sort(([, a], [, b]) => b - a)
-          .slice(0, 5); // Show top 5 only
-
-        sortedPredictions.forEach(([desastre, prob]) => {
-          const percentage = (prob * 100).toFixed(2);
-          const emoji = prob > 0.3 ? "🔴" : prob > 0.1 ? "🟡" : "🟢";
-          texto += `${emoji} ${desastre}: ${percentage}%\n`;
-        });
-
-        setMessages((m) => [...m, { from: "bot", text: texto }]);
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const data = await response.json();
+
+        if (!data.predictions) {
+          setMessages((m) => [
+            ...m,
+            { from: "bot", text: "❌ Error obteniendo predicción." },
+          ]);
+        } else {
+          // Format predictions nicely
+          let texto = `📊 *Predicción para ${p}, ${region}:*\n\n`;
+
+          // Sort predictions by probability (highest first)
+          const sortedPredictions = Object.entries(data.predictions)
+            .sort(([, a], [, b]) => b - a)
+            .slice(0, 5); // Show top 5 only
+
+          sortedPredictions.forEach(([desastre, prob]) => {
+            const percentage = (prob * 100).toFixed(2);
+            const emoji = prob > 0.3 ? "🔴" : prob > 0.1 ? "🟡" : "🟢";
+            texto += `${emoji} ${desastre}: ${percentage}%\n`;
+          });
+
+          setMessages((m) => [...m, { from: "bot", text: texto }]);
+        }
       }
     } catch (e) {
       console.error("Prediction error:", e);
@@ -58,7 +58,7 @@ export default function GlobeMap({ style }) {
   const fetchDisasters = async () => {
     try {
       console.log('🌍 Fetching disasters from backend...');
-      const response = await fetch(`${AI_API_URL}/disasters`);
+      const response = await fetch(`${AI_API_URL}/disasters?fields=id,category,lat,lng`);
       
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`);
@@ -310,12 +310,28 @@ export default function GlobeMap({ style }) {
     setLoading(false);
   };
 
+  // The globe only loads id, category and coordinates; title, date,
+  // description and source link are fetched when a marker is tapped
+  const fetchEventDetails = async (marker) => {
+    try {
+      const response = await fetch(`${AI_API_URL}/disasters/events/${encodeURIComponent(marker.id)}`);
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+      }
+      const details = await response.json();
+      setSelectedEvent((current) => (current?.id === marker.id ? { ...current, ...details.event } : current));
+    } catch (err) {
+      console.error('❌ Failed to fetch event details:', err);
+    }
+  };
+
   const onMessage = (event) => {
     try {
       const data = JSON.parse(event.nativeEvent.data);
       if (data.type === 'eventClick') {
         setSelectedEvent(data.payload);
         setModalVisible(true);
+        fetchEventDetails(data.payload);
       }
     } catch (err) {
       // ignore